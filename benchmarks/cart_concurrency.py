@@ -0,0 +1,105 @@
+"""
+Measure cart mutation throughput under concurrent writers.
+
+Run it from a project that installs django_mall_cart, against a database
+that supports row locks (PostgreSQL):
+
+    DJANGO_SETTINGS_MODULE=project.settings python benchmarks/cart_concurrency.py \
+        --organization <org pk> --customer <user pk> --variant <variant pk>
+
+Each writer adds one unit of the variant with cartLineMergeBatch semantics.
+The "one cart" scenario points every writer at the same cart; the "many carts"
+scenario gives each writer its own cart.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import django
+
+
+def run(carts, variant_global_id, writers, iterations):
+    from django.core.exceptions import ValidationError
+    from django.db import connection, transaction
+
+    from django_mall_cart.services.cart_line_service import CartLineService
+
+    def write(index):
+        cart = carts[index % len(carts)]
+        done = conflicts = 0
+        try:
+            for _ in range(iterations):
+                try:
+                    with transaction.atomic():
+                        cart_line_service = CartLineService(cart=cart)
+                        cart_line_service.lock_cart()
+                        cart_line_service.merge_lines([variant_global_id], [1])
+                    done = done + 1
+                except ValidationError:
+                    conflicts = conflicts + 1
+        finally:
+            connection.close()
+
+        return done, conflicts
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as executor:
+        results = list(executor.map(write, range(writers)))
+    elapsed = time.perf_counter() - started_at
+
+    done = sum(result[0] for result in results)
+    conflicts = sum(result[1] for result in results)
+
+    return done, conflicts, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--organization", required=True)
+    parser.add_argument("--customer", required=True)
+    parser.add_argument("--variant", required=True)
+    parser.add_argument("--writers", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    django.setup()
+
+    from graphql_relay import to_global_id
+    from safedelete.models import HARD_DELETE
+
+    from django_app_account.models import User
+    from django_app_organization.models import Organization
+    from django_mall_cart.models import Cart
+    from django_mall_cart.services.cart_service import CartService
+
+    organization = Organization.objects.get(pk=args.organization)
+    customer = User.objects.get(pk=args.customer)
+    cart_service = CartService(organization=organization, customer=customer)
+    variant_global_id = to_global_id("VariantNode", args.variant)
+
+    scenarios = {
+        "one cart": 1,
+        "many carts": args.writers,
+    }
+    for name, cart_count in scenarios.items():
+        carts = [
+            cart_service.create_cart(slug="benchmark-" + str(index))[1]
+            for index in range(cart_count)
+        ]
+
+        done, conflicts, elapsed = run(
+            carts, variant_global_id, args.writers, args.iterations
+        )
+        print(
+            "%-10s writers=%d carts=%d done=%d conflicts=%d %.1f writes/s"
+            % (name, args.writers, cart_count, done, conflicts, done / elapsed)
+        )
+
+        Cart.objects.filter(pk__in=[cart.pk for cart in carts]).delete(
+            force_policy=HARD_DELETE
+        )
+
+
+if __name__ == "__main__":
+    main()
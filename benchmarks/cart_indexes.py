@@ -0,0 +1,64 @@
+"""
+Print query counts and plans for the cart access patterns.
+
+Run it from a project that installs django_mall_cart:
+
+    DJANGO_SETTINGS_MODULE=project.settings python benchmarks/cart_indexes.py \
+        --cart <cart pk>
+
+Each pattern lists the number of statements it executed followed by the
+EXPLAIN output, so the plans can be checked for the cart indexes:
+cart_cartline_live_variant_uniq, cart_cartline_cart_seek_idx,
+cart_cart_customer_seek_idx and cart_cart_live_slug_idx.
+"""
+
+import argparse
+
+import django
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cart", required=True)
+    args = parser.parse_args()
+
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from django_mall_cart.models import Cart, CartLine
+
+    cart = Cart.objects.get(pk=args.cart)
+    variant_ids = list(
+        CartLine.objects.filter(cart=cart).values_list("variant_id", flat=True)[:50]
+    )
+
+    patterns = {
+        "lines by (cart, variant)": CartLine.objects.filter(
+            cart_id=cart.pk, variant_id__in=variant_ids
+        ),
+        "lines by cart": CartLine.objects.filter(cart_id=cart.pk),
+        "lines keyset page": CartLine.objects.filter(cart_id=cart.pk).order_by(
+            "updated_at", "id"
+        )[:21],
+        "carts keyset page": Cart.objects.filter(customer_id=cart.customer_id).order_by(
+            "updated_at", "id"
+        )[:21],
+        "cart by slug": Cart.objects.filter(
+            customer_id=cart.customer_id,
+            organization_id=cart.organization_id,
+            slug=cart.slug,
+        ),
+    }
+    for name, queryset in patterns.items():
+        with CaptureQueriesContext(connection) as context:
+            list(queryset)
+
+        print("== %s (%d queries)" % (name, len(context.captured_queries)))
+        print(queryset.explain())
+        print()
+
+
+if __name__ == "__main__":
+    main()
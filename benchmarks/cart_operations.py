@@ -0,0 +1,334 @@
+"""
+Query-count, latency and allocation benchmarks for the storefront cart schema.
+
+Run it from a project that installs django_mall_cart. The benchmark creates a
+throwaway test database from the project's DATABASES setting, so the same
+script runs against SQLite or a local PostgreSQL:
+
+    DJANGO_SETTINGS_MODULE=project.settings python benchmarks/cart_operations.py
+
+Every operation is executed for carts of 1, 10, 100 and 1000 lines, and the
+cart and cartLines queries are repeated through schema.execute_async to
+cover the async resolvers. The results are compared with
+benchmarks/cart_operations.json and the script exits with status 1 when an
+operation needs more queries than recorded, or takes more than --tolerance
+times the recorded wall time or peak allocation. Pass --update to record the
+current results as the new thresholds.
+"""
+
+import argparse
+import datetime
+from decimal import Decimal
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import django
+
+
+SIZES = (1, 10, 100, 1000)
+THRESHOLDS_PATH = os.path.join(os.path.dirname(__file__), "cart_operations.json")
+
+CART_QUERY = """
+query ($id: ID!) {
+  cart(id: $id) {
+    quantity
+    costFinal { amount currency }
+    costTotal { amount currency }
+    cartlineSet {
+      edges {
+        node {
+          quantity
+          cost { amount }
+          costFinal { amount }
+          merchandise {
+            productSlug
+            variantSlug
+            photoUrl
+            status
+            selectedOptionValues
+            translations { name }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+CART_LINES_QUERY = """
+query {
+  cartLines {
+    edges {
+      node {
+        quantity
+        cost { amount }
+        merchandise { variantId photoUrl selectedOptionValues }
+      }
+    }
+  }
+}
+"""
+
+BATCH_MUTATION = """
+mutation ($input: %(input)s!) {
+  %(field)s(input: $input) {
+    success
+    warnings { done notFound error }
+    cart { quantity costFinal { amount } }
+  }
+}
+"""
+
+
+class Context:
+    def __init__(self, user):
+        self.user = user
+        self.META = {}
+
+    async def auser(self):
+        return self.user
+
+
+counter = itertools.count()
+
+
+def make(model, **overrides):
+    from django.db import models
+
+    values = {}
+    for field in model._meta.concrete_fields:
+        if field.primary_key or field.name in overrides:
+            continue
+        if field.has_default() or field.null or getattr(field, "auto_now", False):
+            continue
+        if getattr(field, "auto_now_add", False):
+            continue
+
+        if isinstance(field, models.ForeignKey):
+            values[field.name] = make(field.related_model)
+        elif isinstance(field, models.BooleanField):
+            values[field.name] = True
+        elif isinstance(field, models.DecimalField):
+            values[field.name] = Decimal("10.00")
+        elif isinstance(field, (models.IntegerField, models.FloatField)):
+            values[field.name] = 1
+        elif isinstance(field, models.DateTimeField):
+            values[field.name] = datetime.datetime.now(datetime.timezone.utc)
+        elif isinstance(field, models.DateField):
+            values[field.name] = datetime.date.today()
+        elif isinstance(field, models.EmailField):
+            values[field.name] = "benchmark-%d@example.com" % next(counter)
+        else:
+            value = "benchmark-%d" % next(counter)
+            max_length = getattr(field, "max_length", None)
+            values[field.name] = value[-max_length:] if max_length else value
+
+    values.update(overrides)
+
+    return model.objects.create(**values)
+
+
+def make_cart(organization, customer, size):
+    from django_mall_cart.models import Cart, CartLine
+    from django_mall_product.models import Product, ProductPhoto, Variant
+
+    cart = Cart.objects.create(
+        organization=organization, customer=customer, slug="benchmark-%d" % size
+    )
+
+    variant_ids = []
+    cart_lines = []
+    for _ in range(size):
+        product = make(
+            Product,
+            organization=organization,
+            is_published=True,
+            published_at=None,
+        )
+        make(ProductPhoto, product=product, is_primary=True)
+        variant = make(
+            Variant,
+            product=product,
+            is_primary=False,
+            is_published=True,
+            published_at=None,
+            price_amount=Decimal("12.00"),
+            price_sale_amount=Decimal("10.00"),
+        )
+        variant_ids.append(variant.pk)
+        cart_lines.append(CartLine(cart=cart, variant=variant, quantity=1))
+    CartLine.objects.bulk_create(cart_lines)
+
+    return cart, variant_ids
+
+
+def measure(schema, query, context, variables=None, is_async=False):
+    from asgiref.sync import async_to_sync
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        if is_async:
+            # Database work of the async resolvers is handed back to this
+            # thread, so the queries are captured on its connection.
+            result = async_to_sync(schema.execute_async)(
+                query, variable_values=variables, context_value=context
+            )
+        else:
+            result = schema.execute(
+                query, variable_values=variables, context_value=context
+            )
+    elapsed = time.perf_counter() - started_at
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if result.errors:
+        raise RuntimeError(result.errors)
+
+    return {
+        "queries": len(queries.captured_queries),
+        "seconds": round(elapsed, 4),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run():
+    from django.core.cache import cache
+    from graphql_relay import to_global_id
+
+    from django_app_account.models import User
+    from django_app_organization.models import Organization
+    from django_mall_cart.graphql.schema_storefront import schema
+
+    organization = make(Organization)
+    customer = make(User)
+    context = Context(customer)
+
+    results = {}
+    for size in SIZES:
+        cart, variant_ids = make_cart(organization, customer, size)
+        cart_id = to_global_id("CartNode", cart.pk)
+        variant_id_list = [to_global_id("VariantNode", pk) for pk in variant_ids]
+
+        cache.clear()
+        operations = {
+            "cart": (CART_QUERY, {"id": cart_id}),
+            "cartLines": (CART_LINES_QUERY, None),
+            "cartLineUpdateBatch": (
+                BATCH_MUTATION
+                % {"input": "UpdateCartLineBatchInput", "field": "cartLineUpdateBatch"},
+                {
+                    "input": {
+                        "cartId": cart_id,
+                        "variantIdList": variant_id_list,
+                        "quantityList": [2] * size,
+                    }
+                },
+            ),
+            "cartLineDeleteBatch": (
+                BATCH_MUTATION
+                % {"input": "DeleteCartLineBatchInput", "field": "cartLineDeleteBatch"},
+                {"input": {"cartId": cart_id, "variantIdList": variant_id_list}},
+            ),
+            "cartLineCreateBatch": (
+                BATCH_MUTATION
+                % {"input": "CreateCartLineBatchInput", "field": "cartLineCreateBatch"},
+                {
+                    "input": {
+                        "cartId": cart_id,
+                        "variantIdList": variant_id_list,
+                        "quantityList": [1] * size,
+                    }
+                },
+            ),
+        }
+        for name, (query, variables) in operations.items():
+            results["%s/%d" % (name, size)] = measure(schema, query, context, variables)
+            if name in ("cart", "cartLines"):
+                results["%sAsync/%d" % (name, size)] = measure(
+                    schema, query, context, variables, is_async=True
+                )
+
+    return results
+
+
+def compare(results, thresholds, tolerance):
+    failures = []
+    for key, result in results.items():
+        threshold = thresholds.get(key)
+        if threshold is None:
+            continue
+
+        if result["queries"] > threshold["queries"]:
+            failures.append(
+                "%s: %d queries > %d" % (key, result["queries"], threshold["queries"])
+            )
+        if result["seconds"] > threshold["seconds"] * tolerance:
+            failures.append(
+                "%s: %.4fs > %.4fs x %.1f"
+                % (key, result["seconds"], threshold["seconds"], tolerance)
+            )
+        if result["peak_kib"] > threshold["peak_kib"] * tolerance:
+            failures.append(
+                "%s: %.1f KiB > %.1f KiB x %.1f"
+                % (key, result["peak_kib"], threshold["peak_kib"], tolerance)
+            )
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--update", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH)
+    args = parser.parse_args()
+
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        results = run()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    for key, result in results.items():
+        print(
+            "%-28s %5d queries %9.4fs %10.1f KiB"
+            % (key, result["queries"], result["seconds"], result["peak_kib"])
+        )
+
+    if args.update:
+        with open(args.thresholds, "w") as file:
+            json.dump(results, file, indent=4)
+            file.write("\n")
+        return
+
+    thresholds = {}
+    if os.path.exists(args.thresholds):
+        with open(args.thresholds) as file:
+            thresholds = json.load(file)
+
+    failures = compare(results, thresholds, args.tolerance)
+    for failure in failures:
+        print("REGRESSION " + failure)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class CartConfig(AppConfig):
+    name = "django_mall_cart"
+
+    def ready(self):
+        from django_mall_cart import signals  # noqa: F401
@@ -1,14 +1,20 @@
 import graphene
 
-from django_mall_cart.graphql.storefront.cart import CartQuery
+from django_mall_cart.graphql.storefront.cart import CartMutation, CartQuery
 from django_mall_cart.graphql.storefront.cart_line import (
     CartLineMutation,
     CartLineQuery,
 )
+from django_mall_cart.graphql.storefront.guest_cart import (
+    GuestCartMutation,
+    GuestCartQuery,
+)
 
 
 class Mutation(
     CartLineMutation,
+    CartMutation,
+    GuestCartMutation,
     graphene.ObjectType,
 ):
     pass
@@ -17,6 +23,7 @@ class Mutation(
 class Query(
     CartLineQuery,
     CartQuery,
+    GuestCartQuery,
     graphene.ObjectType,
 ):
     pass
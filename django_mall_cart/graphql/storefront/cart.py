@@ -1,11 +1,111 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from graphene import ResolveInfo
+from graphql_relay import from_global_id
 import graphene
 
-from django_mall_cart.graphql.storefront.types.cart import CartNode
+from django_app_core.decorators import strip_input
+from django_mall_cart.graphql.storefront.keyset import (
+    create_keyset_connection,
+    paginate,
+)
+from django_mall_cart.graphql.storefront.types.cart import CartNode, CartSummaryType
+from django_mall_cart.helpers.async_helper import sync_when_async
+from django_mall_cart.helpers.cart_counter_helper import CartCounterHelper
+from django_mall_cart.models import Cart
+from django_mall_cart.services.cart_line_service import CartLineService
+
+
+CartKeysetConnection = create_keyset_connection(CartNode, "CartKeysetConnection")
+
+
+class ClearCart(graphene.relay.ClientIDMutation):
+    class Input:
+        cartId = graphene.ID(required=True)
+        expectedVersion = graphene.Int()
+
+    success = graphene.Boolean()
+    cart = graphene.Field(CartNode)
+
+    @classmethod
+    @sync_when_async
+    @strip_input
+    @transaction.atomic
+    def mutate_and_get_payload(
+        cls,
+        root,
+        info: ResolveInfo,
+        **input,
+    ):
+        cartId = input["cartId"]
+
+        if info.context.user.is_anonymous:
+            raise ValidationError("This operation is not allowed!")
+
+        try:
+            _, cart_id = from_global_id(cartId)
+        except:
+            raise ValidationError("Bad Request!")
+
+        try:
+            cart = Cart.objects.only("id").get(
+                id=cart_id, customer_id=info.context.user.id
+            )
+        except:
+            raise ValidationError("Can not find this cart!")
+
+        cart_line_service = CartLineService(cart=cart)
+        cart_line_service.check_version(
+            cart_line_service.lock_cart(), input.get("expectedVersion")
+        )
+        cart_line_service.clear_lines()
+
+        return ClearCart(success=True, cart=cart)
 
 
 class CartMutation(graphene.ObjectType):
-    pass
+    cart_clear = ClearCart.Field()
 
 
 class CartQuery(graphene.ObjectType):
     cart = graphene.relay.Node.Field(CartNode)
+    cart_summary = graphene.Field(
+        CartSummaryType,
+        organization_id=graphene.ID(required=True),
+        slug=graphene.String(default_value="default"),
+    )
+    carts_keyset = graphene.Field(
+        CartKeysetConnection,
+        first=graphene.Int(default_value=20),
+        after=graphene.String(),
+        with_total_count=graphene.Boolean(default_value=False),
+    )
+
+    @staticmethod
+    @sync_when_async
+    def resolve_cart_summary(
+        root, info: ResolveInfo, organization_id, slug="default", **kwargs
+    ):
+        if info.context.user.is_anonymous:
+            raise ValidationError("This operation is not allowed!")
+
+        try:
+            _, organization_id = from_global_id(organization_id)
+        except:
+            raise ValidationError("Bad Request!")
+
+        return CartCounterHelper.get_summary(
+            organization_id, info.context.user.id, slug
+        )
+
+    @staticmethod
+    @sync_when_async
+    def resolve_carts_keyset(
+        root, info: ResolveInfo, first=20, after=None, with_total_count=False, **kwargs
+    ):
+        queryset = CartNode.get_queryset(Cart.objects.all(), info)
+
+        return paginate(
+            queryset, first=first, after=after, with_total_count=with_total_count
+        )
@@ -1,26 +1,34 @@
-import datetime
-
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import Q
 
 from graphene import ResolveInfo
-from graphene_django.filter import DjangoFilterConnectionField
 from graphql_relay import from_global_id
 import graphene
 
 from django_app_core.decorators import strip_input
-from django_app_core.relay.connection import DjangoFilterConnectionField
 from django_app_core.types import TaskWarningType
+from django_mall_cart.graphql.storefront.fields import SyncFilterConnectionField
+from django_mall_cart.graphql.storefront.keyset import (
+    create_keyset_connection,
+    paginate,
+)
 from django_mall_cart.graphql.storefront.types.cart import CartNode
 from django_mall_cart.graphql.storefront.types.cart_line import CartLineNode
+from django_mall_cart.helpers.async_helper import sync_when_async
+from django_mall_cart.helpers.instrumentation_helper import instrumentation
 from django_mall_cart.models import Cart, CartLine
-from django_mall_product.models import Variant
+from django_mall_cart.services.cart_line_service import CartLineService
+
+
+CartLineKeysetConnection = create_keyset_connection(
+    CartLineNode, "CartLineKeysetConnection"
+)
 
 
 class CreateCartLineBatch(graphene.relay.ClientIDMutation):
     class Input:
         cartId = graphene.ID(required=True)
+        expectedVersion = graphene.Int()
         variantIdList = graphene.List(graphene.NonNull(graphene.ID), required=True)
         quantityList = graphene.List(
             graphene.NonNull(graphene.Int), required=True, min_value=1
@@ -31,6 +39,7 @@ class CreateCartLineBatch(graphene.relay.ClientIDMutation):
     cart = graphene.Field(CartNode)
 
     @classmethod
+    @sync_when_async
     @strip_input
     @transaction.atomic
     def mutate_and_get_payload(
@@ -43,14 +52,6 @@ class CreateCartLineBatch(graphene.relay.ClientIDMutation):
         variantIdList = input["variantIdList"]
         quantityList = input["quantityList"]
 
-        warnings = {
-            "done": [],
-            "in_protected": [],
-            "in_use": [],
-            "not_found": [],
-            "error": [],
-        }
-
         try:
             _, cart_id = from_global_id(cartId)
         except:
@@ -68,54 +69,15 @@ class CreateCartLineBatch(graphene.relay.ClientIDMutation):
         except:
             raise ValidationError("Can not find this cart!")
 
-        for index, variantId in enumerate(variantIdList):
-            quantity = int(quantityList[index])
-            if quantity <= 0:
-                warnings["error"].append(variantId)
-            elif isinstance(variantId, str):
-                try:
-                    _, variant_id = from_global_id(variantId)
-                except:
-                    warnings["error"].append(variantId)
-                else:
-                    variant = (
-                        Variant.objects.filter(pk=variant_id)
-                        .filter(
-                            Q(published_at__lte=datetime.date.today())
-                            | Q(published_at__isnull=True),
-                            is_published=True,
-                        )
-                        .filter(
-                            Q(product__published_at__lte=datetime.date.today())
-                            | Q(product__published_at__isnull=True),
-                            product__is_published=True,
-                        )
-                        .first()
-                    )
-                    if variant:
-                        if (
-                            variant.is_primary
-                            and Variant.objects.filter(product=variant.product).count()
-                            > 1
-                        ):
-                            warnings["in_protected"].append(variantId)
-                        else:
-                            cart_line = CartLine.objects.filter(
-                                cart_id=cart_id, variant_id=variant_id
-                            ).first()
-                            if cart_line:
-                                warnings["in_use"].append(variantId)
-                            else:
-                                CartLine.objects.create(
-                                    cart_id=cart_id,
-                                    variant_id=variant_id,
-                                    quantity=quantity,
-                                )
-                                warnings["done"].append(variantId)
-                    else:
-                        warnings["not_found"].append(variantId)
-            else:
-                warnings["error"].append(variantId)
+        instrumentation.histogram(
+            "cart.line.batch_size", len(variantIdList), mutation="create"
+        )
+
+        cart_line_service = CartLineService(cart=cart)
+        cart_line_service.check_version(
+            cart_line_service.lock_cart(), input.get("expectedVersion")
+        )
+        warnings = cart_line_service.create_lines(variantIdList, quantityList)
 
         return CreateCartLineBatch(success=True, warnings=warnings, cart=cart)
 
@@ -123,6 +85,7 @@ class CreateCartLineBatch(graphene.relay.ClientIDMutation):
 class DeleteCartLineBatch(graphene.relay.ClientIDMutation):
     class Input:
         cartId = graphene.ID(required=True)
+        expectedVersion = graphene.Int()
         variantIdList = graphene.List(graphene.NonNull(graphene.ID), required=True)
 
     success = graphene.Boolean()
@@ -130,6 +93,7 @@ class DeleteCartLineBatch(graphene.relay.ClientIDMutation):
     cart = graphene.Field(CartNode)
 
     @classmethod
+    @sync_when_async
     @strip_input
     @transaction.atomic
     def mutate_and_get_payload(
@@ -141,14 +105,6 @@ class DeleteCartLineBatch(graphene.relay.ClientIDMutation):
         cartId = input["cartId"]
         variantIdList = input["variantIdList"]
 
-        warnings = {
-            "done": [],
-            "in_protected": [],
-            "in_use": [],
-            "not_found": [],
-            "error": [],
-        }
-
         try:
             _, cart_id = from_global_id(cartId)
         except:
@@ -162,31 +118,23 @@ class DeleteCartLineBatch(graphene.relay.ClientIDMutation):
         except:
             raise ValidationError("Can not find this cart!")
 
-        for index, variantId in enumerate(variantIdList):
-            if isinstance(variantId, str):
-                try:
-                    _, variant_id = from_global_id(variantId)
-                except:
-                    warnings["error"].append(variantId)
-                else:
-                    cart_line = CartLine.objects.filter(
-                        cart_id=cart_id, variant_id=variant_id
-                    ).first()
-                    if cart_line:
-                        cart_line.delete()
-
-                        warnings["done"].append(variantId)
-                    else:
-                        warnings["not_found"].append(variantId)
-            else:
-                warnings["error"].append(variantId)
+        instrumentation.histogram(
+            "cart.line.batch_size", len(variantIdList), mutation="delete"
+        )
+
+        cart_line_service = CartLineService(cart=cart)
+        cart_line_service.check_version(
+            cart_line_service.lock_cart(), input.get("expectedVersion")
+        )
+        warnings = cart_line_service.delete_lines(variantIdList)
 
         return DeleteCartLineBatch(success=True, warnings=warnings, cart=cart)
 
 
-class UpdateCartLineBatch(graphene.relay.ClientIDMutation):
+class MergeCartLineBatch(graphene.relay.ClientIDMutation):
     class Input:
         cartId = graphene.ID(required=True)
+        expectedVersion = graphene.Int()
         variantIdList = graphene.List(graphene.NonNull(graphene.ID), required=True)
         quantityList = graphene.List(
             graphene.NonNull(graphene.Int), required=True, min_value=1
@@ -197,6 +145,7 @@ class UpdateCartLineBatch(graphene.relay.ClientIDMutation):
     cart = graphene.Field(CartNode)
 
     @classmethod
+    @sync_when_async
     @strip_input
     @transaction.atomic
     def mutate_and_get_payload(
@@ -208,14 +157,71 @@ class UpdateCartLineBatch(graphene.relay.ClientIDMutation):
         cartId = input["cartId"]
         variantIdList = input["variantIdList"]
         quantityList = input["quantityList"]
+        client_mutation_id = input.get("client_mutation_id")
+
+        if info.context.user.is_anonymous:
+            raise ValidationError("This operation is not allowed!")
+
+        try:
+            _, cart_id = from_global_id(cartId)
+        except:
+            raise ValidationError("Bad Request!")
+
+        if variantIdList is None or len(variantIdList) == 0:
+            raise ValidationError("variantIdList should not be empty!")
+        elif len(variantIdList) != len(quantityList):
+            raise ValidationError(
+                "variantIdList and quantityList must be the same length!"
+            )
+
+        try:
+            cart = Cart.objects.only("id").get(
+                id=cart_id, customer_id=info.context.user.id
+            )
+        except:
+            raise ValidationError("Can not find this cart!")
+
+        instrumentation.histogram(
+            "cart.line.batch_size", len(variantIdList), mutation="merge"
+        )
+
+        cart_line_service = CartLineService(cart=cart)
+        version = cart_line_service.lock_cart()
+        warnings = cart_line_service.get_replayed_warnings(client_mutation_id)
+        if warnings is None:
+            cart_line_service.check_version(version, input.get("expectedVersion"))
+            warnings = cart_line_service.merge_lines(variantIdList, quantityList)
+            cart_line_service.set_replayed_warnings(client_mutation_id, warnings)
+
+        return MergeCartLineBatch(success=True, warnings=warnings, cart=cart)
 
-        warnings = {
-            "done": [],
-            "in_protected": [],
-            "in_use": [],
-            "not_found": [],
-            "error": [],
-        }
+
+class UpdateCartLineBatch(graphene.relay.ClientIDMutation):
+    class Input:
+        cartId = graphene.ID(required=True)
+        expectedVersion = graphene.Int()
+        variantIdList = graphene.List(graphene.NonNull(graphene.ID), required=True)
+        quantityList = graphene.List(
+            graphene.NonNull(graphene.Int), required=True, min_value=1
+        )
+
+    success = graphene.Boolean()
+    warnings = graphene.Field(TaskWarningType)
+    cart = graphene.Field(CartNode)
+
+    @classmethod
+    @sync_when_async
+    @strip_input
+    @transaction.atomic
+    def mutate_and_get_payload(
+        cls,
+        root,
+        info: ResolveInfo,
+        **input,
+    ):
+        cartId = input["cartId"]
+        variantIdList = input["variantIdList"]
+        quantityList = input["quantityList"]
 
         try:
             _, cart_id = from_global_id(cartId)
@@ -234,54 +240,15 @@ class UpdateCartLineBatch(graphene.relay.ClientIDMutation):
         except:
             raise ValidationError("Can not find this cart!")
 
-        for index, variantId in enumerate(variantIdList):
-            quantity = int(quantityList[index])
-            if quantity <= 0:
-                warnings["error"].append(variantId)
-            elif isinstance(variantId, str):
-                try:
-                    _, variant_id = from_global_id(variantId)
-                except:
-                    warnings["error"].append(variantId)
-                else:
-                    variant = (
-                        Variant.objects.filter(pk=variant_id)
-                        .filter(
-                            Q(published_at__lte=datetime.date.today())
-                            | Q(published_at__isnull=True),
-                            is_published=True,
-                        )
-                        .filter(
-                            Q(product__published_at__lte=datetime.date.today())
-                            | Q(product__published_at__isnull=True),
-                            product__is_published=True,
-                        )
-                        .first()
-                    )
-                    if variant:
-                        cart_line = CartLine.objects.filter(
-                            cart_id=cart_id, variant_id=variant_id
-                        ).first()
-                        if cart_line:
-                            if (
-                                variant.is_primary
-                                and Variant.objects.filter(
-                                    product=variant.product
-                                ).count()
-                                > 1
-                            ):
-                                cart_line.delete()
-                                warnings["error"].append(variantId)
-                            else:
-                                cart_line.quantity = quantity
-                                cart_line.save()
-                                warnings["done"].append(variantId)
-                        else:
-                            warnings["not_found"].append(variantId)
-                    else:
-                        warnings["error"].append(variantId)
-            else:
-                warnings["error"].append(variantId)
+        instrumentation.histogram(
+            "cart.line.batch_size", len(variantIdList), mutation="update"
+        )
+
+        cart_line_service = CartLineService(cart=cart)
+        cart_line_service.check_version(
+            cart_line_service.lock_cart(), input.get("expectedVersion")
+        )
+        warnings = cart_line_service.update_lines(variantIdList, quantityList)
 
         return UpdateCartLineBatch(success=True, warnings=warnings, cart=cart)
 
@@ -289,13 +256,44 @@ class UpdateCartLineBatch(graphene.relay.ClientIDMutation):
 class CartLineMutation(graphene.ObjectType):
     cart_line_create_batch = CreateCartLineBatch.Field()
     cart_line_delete_batch = DeleteCartLineBatch.Field()
+    cart_line_merge_batch = MergeCartLineBatch.Field()
     cart_line_update_batch = UpdateCartLineBatch.Field()
 
 
 class CartLineQuery(graphene.ObjectType):
-    cart_lines = DjangoFilterConnectionField(
+    cart_lines = SyncFilterConnectionField(
         CartLineNode,
         orderBy=graphene.List(of_type=graphene.String),
         page_number=graphene.Int(),
         page_size=graphene.Int(),
     )
+    cart_lines_keyset = graphene.Field(
+        CartLineKeysetConnection,
+        cart_id=graphene.ID(),
+        first=graphene.Int(default_value=20),
+        after=graphene.String(),
+        with_total_count=graphene.Boolean(default_value=False),
+    )
+
+    @staticmethod
+    @sync_when_async
+    def resolve_cart_lines_keyset(
+        root,
+        info: ResolveInfo,
+        cart_id=None,
+        first=20,
+        after=None,
+        with_total_count=False,
+        **kwargs,
+    ):
+        queryset = CartLineNode.get_queryset(CartLine.objects.all(), info)
+        if cart_id is not None:
+            try:
+                _, cart_id = from_global_id(cart_id)
+            except:
+                raise ValidationError("Bad Request!")
+            queryset = queryset.filter(cart_id=cart_id)
+
+        return paginate(
+            queryset, first=first, after=after, with_total_count=with_total_count
+        )
@@ -0,0 +1,7 @@
+from django_app_core.relay.connection import DjangoFilterConnectionField
+from django_mall_cart.helpers.async_helper import sync_when_async
+
+
+class SyncFilterConnectionField(DjangoFilterConnectionField):
+    def wrap_resolve(self, parent_resolver):
+        return sync_when_async(super().wrap_resolve(parent_resolver))
@@ -0,0 +1,115 @@
+from django.core.exceptions import ValidationError
+
+from graphene import ResolveInfo
+import graphene
+
+from django_app_core.decorators import strip_input
+from django_app_core.types import TaskWarningType
+from django_app_organization.models import Organization
+from django_mall_cart.graphql.storefront.types.cart import CartNode
+from django_mall_cart.graphql.storefront.types.guest_cart import GuestCartType
+from django_mall_cart.helpers.async_helper import sync_when_async
+from django_mall_cart.helpers.guest_cart_helper import GuestCartHelper
+from django_mall_cart.helpers.instrumentation_helper import instrumentation
+from django_mall_cart.services.cart_service import CartService
+
+
+class SetGuestCartLineBatch(graphene.relay.ClientIDMutation):
+    class Input:
+        token = graphene.String()
+        variantIdList = graphene.List(graphene.NonNull(graphene.ID), required=True)
+        quantityList = graphene.List(
+            graphene.NonNull(graphene.Int), required=True, min_value=0
+        )
+
+    success = graphene.Boolean()
+    warnings = graphene.Field(TaskWarningType)
+    guest_cart = graphene.Field(GuestCartType)
+
+    @classmethod
+    @sync_when_async
+    @strip_input
+    def mutate_and_get_payload(
+        cls,
+        root,
+        info: ResolveInfo,
+        **input,
+    ):
+        token = input.get("token")
+        variantIdList = input["variantIdList"]
+        quantityList = input["quantityList"]
+
+        if variantIdList is None or len(variantIdList) == 0:
+            raise ValidationError("variantIdList should not be empty!")
+        elif len(variantIdList) != len(quantityList):
+            raise ValidationError(
+                "variantIdList and quantityList must be the same length!"
+            )
+
+        instrumentation.histogram(
+            "cart.line.batch_size", len(variantIdList), mutation="guest_set"
+        )
+
+        guest_cart_helper = GuestCartHelper(token=token)
+        warnings = guest_cart_helper.set_lines(variantIdList, quantityList)
+
+        return SetGuestCartLineBatch(
+            success=True, warnings=warnings, guest_cart=guest_cart_helper
+        )
+
+
+class MergeGuestCart(graphene.relay.ClientIDMutation):
+    class Input:
+        token = graphene.String(required=True)
+        slug = graphene.String(default_value="default")
+
+    success = graphene.Boolean()
+    warnings = graphene.Field(TaskWarningType)
+    cart = graphene.Field(CartNode)
+
+    @classmethod
+    @sync_when_async
+    @strip_input
+    def mutate_and_get_payload(
+        cls,
+        root,
+        info: ResolveInfo,
+        **input,
+    ):
+        token = input["token"]
+        slug = input.get("slug") or "default"
+
+        if info.context.user.is_anonymous:
+            raise ValidationError("This operation is not allowed!")
+
+        guest_cart_helper = GuestCartHelper(token=token)
+        if guest_cart_helper.organization_id is None:
+            raise ValidationError("Can not find this cart!")
+
+        try:
+            organization = Organization.objects.get(
+                pk=guest_cart_helper.organization_id
+            )
+        except:
+            raise ValidationError("Can not find this organization!")
+
+        cart_service = CartService(
+            organization=organization, customer=info.context.user
+        )
+        warnings, cart = cart_service.merge_guest_cart(guest_cart_helper, slug=slug)
+
+        return MergeGuestCart(success=True, warnings=warnings, cart=cart)
+
+
+class GuestCartMutation(graphene.ObjectType):
+    guest_cart_line_set_batch = SetGuestCartLineBatch.Field()
+    guest_cart_merge = MergeGuestCart.Field()
+
+
+class GuestCartQuery(graphene.ObjectType):
+    guest_cart = graphene.Field(GuestCartType, token=graphene.String(required=True))
+
+    @staticmethod
+    @sync_when_async
+    def resolve_guest_cart(root, info: ResolveInfo, token, **kwargs):
+        return GuestCartHelper(token=token)
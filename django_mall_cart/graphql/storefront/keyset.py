@@ -0,0 +1,89 @@
+import base64
+import datetime
+from typing import Optional
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+
+import graphene
+
+
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(updated_at: datetime.datetime, pk) -> str:
+    value = updated_at.isoformat() + "|" + str(pk)
+
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        value = base64.urlsafe_b64decode(cursor.encode()).decode()
+        updated_at, pk = value.split("|", 1)
+        return datetime.datetime.fromisoformat(updated_at), pk
+    except:
+        raise ValidationError("Bad Request!")
+
+
+def paginate(
+    queryset: QuerySet,
+    first: int = 20,
+    after: Optional[str] = None,
+    with_total_count: bool = False,
+) -> dict:
+    if first is None or first <= 0 or first > MAX_PAGE_SIZE:
+        raise ValidationError("first must be between 1 and " + str(MAX_PAGE_SIZE) + "!")
+
+    total_count = queryset.count() if with_total_count else None
+
+    queryset = queryset.order_by("updated_at", "id")
+    if after:
+        updated_at, pk = decode_cursor(after)
+        queryset = queryset.filter(
+            Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk)
+        )
+
+    nodes = list(queryset[: first + 1])
+    has_next_page = len(nodes) > first
+    nodes = nodes[:first]
+
+    edges = [
+        {"node": node, "cursor": encode_cursor(node.updated_at, node.pk)}
+        for node in nodes
+    ]
+
+    return {
+        "edges": edges,
+        "page_info": {
+            "has_next_page": has_next_page,
+            "end_cursor": edges[-1]["cursor"] if edges else None,
+        },
+        "total_count": total_count,
+    }
+
+
+class KeysetPageInfo(graphene.ObjectType):
+    has_next_page = graphene.Boolean(required=True)
+    end_cursor = graphene.String()
+
+
+def create_keyset_connection(node, name: str):
+    edge = type(
+        name + "Edge",
+        (graphene.ObjectType,),
+        {
+            "node": graphene.Field(node, required=True),
+            "cursor": graphene.String(required=True),
+        },
+    )
+
+    return type(
+        name,
+        (graphene.ObjectType,),
+        {
+            "edges": graphene.List(graphene.NonNull(edge), required=True),
+            "page_info": graphene.Field(KeysetPageInfo, required=True),
+            "total_count": graphene.Int(),
+        },
+    )
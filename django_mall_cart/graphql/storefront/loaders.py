@@ -0,0 +1,208 @@
+import asyncio
+from typing import Dict, Iterable, List
+
+from django_mall_cart.helpers.photo_url_helper import PhotoUrlHelper
+from django_mall_cart.models import CartLine
+from django_mall_cart.services.merchandise_projection_service import (
+    MerchandiseProjectionService,
+)
+from django_mall_product.models import ProductTrans
+
+
+class CartLineLoader:
+    def __init__(self):
+        self.cache = {}
+        self.cart_keys = {}
+        self.cart_tasks = {}
+
+    @classmethod
+    def from_context(cls, context) -> "CartLineLoader":
+        loaders = getattr(context, "_cart_loaders", None)
+        if loaders is None:
+            loaders = {}
+            setattr(context, "_cart_loaders", loaders)
+
+        if cls not in loaders:
+            loaders[cls] = cls()
+
+        return loaders[cls]
+
+    @staticmethod
+    def get_index_queryset(cart_id):
+        return CartLine.objects.filter(cart_id=cart_id).values(
+            "variant_id",
+            "variant__product_id",
+        )
+
+    @staticmethod
+    def set_guest_cart_index(context, cart_lines: List[CartLine]) -> None:
+        # Guest lines aren't stored, so their index comes from the guest cart.
+        setattr(
+            context,
+            "_guest_cart_index",
+            [
+                {
+                    "variant_id": cart_line.variant_id,
+                    "variant__product_id": cart_line.variant.product_id,
+                }
+                for cart_line in cart_lines
+            ],
+        )
+
+    @classmethod
+    def get_cart_index(cls, context, cart_id) -> List[dict]:
+        if cart_id is None:
+            return getattr(context, "_guest_cart_index", [])
+
+        indexes = getattr(context, "_cart_indexes", None)
+        if indexes is None:
+            indexes = {}
+            setattr(context, "_cart_indexes", indexes)
+
+        if cart_id not in indexes:
+            indexes[cart_id] = list(cls.get_index_queryset(cart_id))
+
+        return indexes[cart_id]
+
+    @classmethod
+    async def aget_cart_index(cls, context, cart_id) -> List[dict]:
+        if cart_id is None:
+            return getattr(context, "_guest_cart_index", [])
+
+        tasks = getattr(context, "_cart_index_tasks", None)
+        if tasks is None:
+            tasks = {}
+            setattr(context, "_cart_index_tasks", tasks)
+
+        if cart_id not in tasks:
+
+            async def load():
+                return [item async for item in cls.get_index_queryset(cart_id)]
+
+            tasks[cart_id] = asyncio.ensure_future(load())
+
+        return await tasks[cart_id]
+
+    def get_key(self, root: CartLine):
+        raise NotImplementedError
+
+    def get_cart_keys(self, index: Iterable[dict]) -> List:
+        raise NotImplementedError
+
+    def batch_load(self, keys: List) -> Dict:
+        raise NotImplementedError
+
+    async def abatch_load(self, keys: List) -> Dict:
+        raise NotImplementedError
+
+    def load(self, root: CartLine, info):
+        key = self.get_key(root)
+        if key not in self.cache:
+            if root.cart_id not in self.cart_keys:
+                index = self.get_cart_index(info.context, root.cart_id)
+                self.cart_keys[root.cart_id] = self.get_cart_keys(index)
+
+            keys = {key}
+            keys.update(
+                cart_key
+                for cart_key in self.cart_keys[root.cart_id]
+                if cart_key not in self.cache
+            )
+            results = self.batch_load(list(keys))
+            for batch_key in keys:
+                self.cache[batch_key] = results.get(batch_key)
+
+        return self.cache[key]
+
+    async def aload_cart(self, key, info, cart_id) -> None:
+        index = await self.aget_cart_index(info.context, cart_id)
+        self.cart_keys[cart_id] = self.get_cart_keys(index)
+
+        keys = {key}
+        keys.update(
+            cart_key
+            for cart_key in self.cart_keys[cart_id]
+            if cart_key not in self.cache
+        )
+        results = await self.abatch_load(list(keys))
+        for batch_key in keys:
+            self.cache[batch_key] = results.get(batch_key)
+
+    async def aload(self, root: CartLine, info):
+        key = self.get_key(root)
+        if key not in self.cache:
+            if root.cart_id not in self.cart_tasks:
+                self.cart_tasks[root.cart_id] = asyncio.ensure_future(
+                    self.aload_cart(key, info, root.cart_id)
+                )
+            await self.cart_tasks[root.cart_id]
+
+            if key not in self.cache:
+                results = await self.abatch_load([key])
+                self.cache[key] = results.get(key)
+
+        return self.cache[key]
+
+
+class MerchandiseProjectionLoader(CartLineLoader):
+    def get_key(self, root: CartLine):
+        return str(root.variant_id)
+
+    def get_cart_keys(self, index: Iterable[dict]) -> List:
+        return [str(item["variant_id"]) for item in index]
+
+    def batch_load(self, keys: List) -> Dict:
+        return MerchandiseProjectionService.get_projections(keys)
+
+    async def abatch_load(self, keys: List) -> Dict:
+        return await MerchandiseProjectionService.aget_projections(keys)
+
+
+class PhotoUrlLoader(MerchandiseProjectionLoader):
+    @staticmethod
+    def get_s3_keys(projections: Dict) -> Dict:
+        return {
+            projection["photo_key"]: projection["photo_s3_key"]
+            for projection in projections.values()
+            if projection["photo_key"]
+        }
+
+    def batch_load(self, keys: List) -> Dict:
+        projections = super().batch_load(keys)
+        urls = PhotoUrlHelper().get_urls_by_key(self.get_s3_keys(projections))
+
+        return {
+            variant_id: urls.get(projection["photo_key"])
+            for variant_id, projection in projections.items()
+        }
+
+    async def abatch_load(self, keys: List) -> Dict:
+        projections = await super().abatch_load(keys)
+        urls = await PhotoUrlHelper().aget_urls_by_key(self.get_s3_keys(projections))
+
+        return {
+            variant_id: urls.get(projection["photo_key"])
+            for variant_id, projection in projections.items()
+        }
+
+
+class ProductTransLoader(CartLineLoader):
+    def get_key(self, root: CartLine):
+        return root.merchandise_projection["product_id"]
+
+    def get_cart_keys(self, index: Iterable[dict]) -> List:
+        return [item["variant__product_id"] for item in index]
+
+    def batch_load(self, keys: List) -> Dict:
+        translations = {key: [] for key in keys}
+        for trans in ProductTrans.objects.filter(product_id__in=keys):
+            translations[trans.product_id].append(trans)
+
+        return translations
+
+    async def abatch_load(self, keys: List) -> Dict:
+        translations = {key: [] for key in keys}
+        async for trans in ProductTrans.objects.filter(product_id__in=keys):
+            translations[trans.product_id].append(trans)
+
+        return translations
@@ -0,0 +1,49 @@
+import inspect
+import time
+
+from graphene import ResolveInfo
+
+from django_mall_cart.helpers.async_helper import is_running_async
+from django_mall_cart.helpers.instrumentation_helper import instrumentation
+
+
+class CartInstrumentationMiddleware:
+    TYPE_NAMES = {
+        "Query",
+        "Mutation",
+        "CartNode",
+        "CartLineNode",
+        "CartMerchandiseType",
+        "GuestCartType",
+        "GuestCartLineType",
+    }
+
+    def resolve(self, next, root, info: ResolveInfo, **args):
+        if not instrumentation.enabled or info.parent_type.name not in self.TYPE_NAMES:
+            return next(root, info, **args)
+
+        sampled = getattr(info.context, "_cart_instrumentation_sampled", None)
+        if sampled is None:
+            sampled = instrumentation.sample()
+            setattr(info.context, "_cart_instrumentation_sampled", sampled)
+
+        field = info.parent_type.name + "." + info.field_name
+        if is_running_async():
+            return self.aresolve(next, root, info, sampled, field, **args)
+
+        with instrumentation.sampling(sampled):
+            with instrumentation.track("resolver", field=field):
+                return next(root, info, **args)
+
+    async def aresolve(self, next, root, info: ResolveInfo, sampled, field, **args):
+        with instrumentation.sampling(sampled):
+            started_at = time.perf_counter()
+            result = next(root, info, **args)
+            if inspect.isawaitable(result):
+                result = await result
+
+            instrumentation.timing(
+                "resolver", time.perf_counter() - started_at, field=field
+            )
+
+        return result
@@ -0,0 +1,86 @@
+from typing import Set
+
+from django.conf import settings
+from django.db.models import Prefetch, QuerySet
+
+from graphene import ResolveInfo
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+
+from django_mall_cart.models import CartLine
+
+
+SUMMARY_FIELD_NAMES = {"costFinal", "costTotal", "quantity"}
+LINE_FIELD_NAMES = {"cartlineSet"}
+
+
+def get_selections(info: ResolveInfo, selection_set) -> list:
+    selections = []
+    if selection_set is None:
+        return selections
+
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            selections.append(selection)
+        elif isinstance(selection, InlineFragmentNode):
+            selections.extend(get_selections(info, selection.selection_set))
+        elif isinstance(selection, FragmentSpreadNode):
+            fragment = info.fragments.get(selection.name.value)
+            if fragment:
+                selections.extend(get_selections(info, fragment.selection_set))
+
+    return selections
+
+
+def get_node_field_names(info: ResolveInfo) -> Set[str]:
+    names = set()
+    for field_node in info.field_nodes:
+        for selection in get_selections(info, field_node.selection_set):
+            if selection.name.value != "edges":
+                names.add(selection.name.value)
+                continue
+
+            for edge in get_selections(info, selection.selection_set):
+                if edge.name.value == "node":
+                    names.update(
+                        node.name.value
+                        for node in get_selections(info, edge.selection_set)
+                    )
+
+    return names
+
+
+def optimize_cart_queryset(queryset: QuerySet, info: ResolveInfo) -> QuerySet:
+    names = get_node_field_names(info)
+
+    if "customer" in names:
+        queryset = queryset.select_related("customer", "customer__profile")
+
+    # cartlineSet pages through CartLineNode.get_queryset, which discards a
+    # prefetch of the lines, so only the summary fields are prefetched for.
+    if names & SUMMARY_FIELD_NAMES and not getattr(
+        settings, "CART_SUMMARY_AGGREGATE", True
+    ):
+        queryset = queryset.prefetch_related(
+            Prefetch(
+                "cartline_set",
+                queryset=CartLine.objects.select_related(
+                    "variant", "variant__product"
+                ).only(
+                    "id",
+                    "cart_id",
+                    "variant_id",
+                    "quantity",
+                    "variant__deleted",
+                    "variant__is_published",
+                    "variant__published_at",
+                    "variant__currency",
+                    "variant__price_amount",
+                    "variant__price_sale_amount",
+                    "variant__product__deleted",
+                    "variant__product__is_published",
+                    "variant__product__published_at",
+                ),
+            )
+        )
+
+    return queryset
@@ -8,7 +8,16 @@ import graphene_django_optimizer as gql_optimizer
 
 from django_app_core.relay.connection import ExtendedConnection
 from django_app_core.types import Money
+from django_mall_cart.graphql.storefront.fields import SyncFilterConnectionField
+from django_mall_cart.graphql.storefront.optimizer import (
+    LINE_FIELD_NAMES,
+    get_node_field_names,
+    optimize_cart_queryset,
+)
+from django_mall_cart.graphql.storefront.types.cart_line import CartLineNode
+from django_mall_cart.helpers.async_helper import aget_user, is_running_async
 from django_mall_cart.helpers.cart_helper import CartHelper
+from django_mall_cart.helpers.cart_snapshot_helper import CartSnapshotHelper
 from django_mall_cart.models import Cart
 
 
@@ -34,6 +43,11 @@ class CartFilter(FilterSet):
     )
 
 
+class CartSummaryType(graphene.ObjectType):
+    quantity = graphene.Int(required=True)
+    line_count = graphene.Int(required=True)
+
+
 class CartConnection(graphene.relay.Connection):
     class Meta:
         node = CartType
@@ -43,6 +57,9 @@ class CartNode(gql_optimizer.OptimizedDjangoObjectType):
     class Meta:
         model = Cart
         exclude = (
+            "cost_final_amount",
+            "cost_final_currency",
+            "is_summary_stale",
             "deleted",
             "deleted_by_cascade",
         )
@@ -54,32 +71,65 @@ class CartNode(gql_optimizer.OptimizedDjangoObjectType):
     cost_shipment = graphene.Field(Money, shipment_id=graphene.ID(default_value=None))
     cost_total = graphene.Field(Money, shipment_id=graphene.ID(default_value=None))
     quantity = graphene.Field(graphene.Int, required=True)
+    cartline_set = SyncFilterConnectionField(CartLineNode)
 
     @classmethod
     def get_queryset(cls, queryset, info: ResolveInfo):
         if info.context.user.is_anonymous:
             raise ValidationError("This operation is not allowed!")
 
-        return (
-            queryset.select_related("customer", "customer__profile")
-            .prefetch_related("cartline_set")
-            .filter(customer_id=info.context.user.id)
+        return optimize_cart_queryset(
+            queryset.filter(customer_id=info.context.user.id), info
         )
 
     @classmethod
     def get_node(cls, info: ResolveInfo, id):
+        use_snapshot = not get_node_field_names(info) & LINE_FIELD_NAMES
+        if is_running_async():
+            return cls.aget_node(info, id, use_snapshot)
+
         if info.context.user.is_anonymous:
             raise ValidationError("This operation is not allowed!")
 
-        return (
-            cls._meta.model.objects.select_related("customer")
-            .filter(pk=id, customer_id=info.context.user.id)
-            .first()
-        )
+        if use_snapshot:
+            cart = CartSnapshotHelper.get_cart(id, info.context.user.id)
+            if cart:
+                return cart
+
+        cart = optimize_cart_queryset(
+            cls._meta.model.objects.filter(pk=id, customer_id=info.context.user.id),
+            info,
+        ).first()
+        if cart and use_snapshot:
+            CartSnapshotHelper.set_cart(cart)
+
+        return cart
+
+    @classmethod
+    async def aget_node(cls, info: ResolveInfo, id, use_snapshot: bool):
+        user = await aget_user(info.context)
+        if user.is_anonymous:
+            raise ValidationError("This operation is not allowed!")
+
+        if use_snapshot:
+            cart = await CartSnapshotHelper.aget_cart(id, user.id)
+            if cart:
+                return cart
+
+        cart = await optimize_cart_queryset(
+            cls._meta.model.objects.filter(pk=id, customer_id=user.id),
+            info,
+        ).afirst()
+        if cart and use_snapshot:
+            await CartSnapshotHelper.aset_cart(cart)
+
+        return cart
 
     @staticmethod
     def resolve_cost_final(root: Cart, info: ResolveInfo):
-        cart_helper = CartHelper(cart=root)
+        cart_helper = CartHelper.from_context(info.context, root)
+        if is_running_async():
+            return cart_helper.aget_cost_final()
 
         return cart_helper.get_cost_final()
 
@@ -87,7 +137,10 @@ class CartNode(gql_optimizer.OptimizedDjangoObjectType):
     def resolve_cost_shipment(
         root: Cart, info: ResolveInfo, shipment_id=None, **kwargs
     ):
-        cart_helper = CartHelper(cart=root)
+        cart_helper = CartHelper.from_context(info.context, root)
+        if is_running_async():
+            return CartNode.aresolve_cost_shipment(cart_helper, shipment_id)
+
         result, cost, currency = cart_helper.get_cost_shipment(shipmentId=shipment_id)
 
         if result:
@@ -96,9 +149,24 @@ class CartNode(gql_optimizer.OptimizedDjangoObjectType):
         else:
             raise ValidationError("Can not find this shipment!")
 
+    @staticmethod
+    async def aresolve_cost_shipment(cart_helper: CartHelper, shipment_id=None):
+        result, cost, currency = await cart_helper.aget_cost_shipment(
+            shipmentId=shipment_id
+        )
+
+        if result:
+            result = {"amount": cost, "currency": currency}
+            return result
+        else:
+            raise ValidationError("Can not find this shipment!")
+
     @staticmethod
     def resolve_cost_total(root: Cart, info: ResolveInfo, shipment_id=None, **kwargs):
-        cart_helper = CartHelper(cart=root)
+        cart_helper = CartHelper.from_context(info.context, root)
+        if is_running_async():
+            return CartNode.aresolve_cost_total(cart_helper, shipment_id)
+
         result, cost, currency = cart_helper.get_cost_total(shipmentId=shipment_id)
 
         if result:
@@ -107,8 +175,22 @@ class CartNode(gql_optimizer.OptimizedDjangoObjectType):
         else:
             raise ValidationError("Can not find this payment or shipment!")
 
+    @staticmethod
+    async def aresolve_cost_total(cart_helper: CartHelper, shipment_id=None):
+        result, cost, currency = await cart_helper.aget_cost_total(
+            shipmentId=shipment_id
+        )
+
+        if result:
+            result = {"amount": cost, "currency": currency}
+            return result
+        else:
+            raise ValidationError("Can not find this payment or shipment!")
+
     @staticmethod
     def resolve_quantity(root: Cart, info: ResolveInfo):
-        cart_helper = CartHelper(cart=root)
+        cart_helper = CartHelper.from_context(info.context, root)
+        if is_running_async():
+            return cart_helper.aget_quantity()
 
         return cart_helper.get_quantity()
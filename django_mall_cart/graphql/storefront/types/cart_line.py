@@ -1,7 +1,4 @@
-from django.conf import settings
-from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.core.files.storage import default_storage
 
 from django_filters import FilterSet, OrderingFilter
 from graphene import ResolveInfo
@@ -12,6 +9,13 @@ import graphene_django_optimizer as gql_optimizer
 
 from django_app_core.relay.connection import ExtendedConnection
 from django_app_core.types import Money
+from django_mall_cart.graphql.storefront.loaders import (
+    MerchandiseProjectionLoader,
+    PhotoUrlLoader,
+    ProductTransLoader,
+)
+from django_mall_cart.helpers.async_helper import aget_user, is_running_async
+from django_mall_cart.helpers.pricing_helper import CartPricingHelper
 from django_mall_cart.models import CartLine
 from django_mall_product.models import ProductTrans
 
@@ -50,104 +54,72 @@ class CartMerchandiseType(DjangoObjectType):
 
     @staticmethod
     def resolve_product_serial(root: CartLine, info: ResolveInfo):
-        return root.variant.product.serial
+        return root.merchandise_projection["product_serial"]
 
     @staticmethod
     def resolve_product_slug(root: CartLine, info: ResolveInfo):
-        return root.variant.product.slug
+        return root.merchandise_projection["product_slug"]
 
     @staticmethod
     def resolve_variant_slug(root: CartLine, info: ResolveInfo):
-        return root.variant.slug
+        return root.merchandise_projection["variant_slug"]
 
     @staticmethod
     def resolve_photo_url(root: CartLine, info: ResolveInfo):
-        object = root.variant.product.productphoto_set.filter(is_primary=True).first()
-        if not object:
-            object = (
-                root.variant.product.productphoto_set.order_by("sort_key")
-                .order_by("created_at")
-                .first()
-            )
-            if not object:
-                return None
-
-        key = (
-            str(object.product.organization_id).replace("-", "")
-            + "/product/"
-            + str(object.product_id).replace("-", "")
-            + "/img-"
-            + object.s3_key
-        )
-        url = cache.get(key)
-        if url:
-            return url
-        else:
-            if default_storage.exists(object.s3_key):
-                url = default_storage.url(object.s3_key)
-
-                cache.set(
-                    key,
-                    url,
-                    int(settings.AWS_QUERYSTRING_EXPIRE) - 600,
-                )
+        loader = PhotoUrlLoader.from_context(info.context)
+        if is_running_async():
+            return loader.aload(root, info)
 
-                return url
-
-            return None
+        return loader.load(root, info)
 
     @staticmethod
     def resolve_variant_id(root: CartLine, info: ResolveInfo):
-        return to_global_id("VariantNode", root.variant.id)
+        return to_global_id("VariantNode", root.merchandise_projection["variant_id"])
 
     @staticmethod
     def resolve_variant_price(root: CartLine, info: ResolveInfo):
-        if root.variant.is_visible and root.variant.product.is_visible:
-            return root.variant.price
+        projection = root.merchandise_projection
+        if projection["is_visible"]:
+            return {
+                "amount": projection["price_amount"],
+                "currency": projection["currency"],
+            }
         else:
             return None
 
     @staticmethod
     def resolve_variant_price_sale(root: CartLine, info: ResolveInfo):
-        if root.variant.is_visible and root.variant.product.is_visible:
-            return root.variant.price_sale
+        projection = root.merchandise_projection
+        if projection["is_visible"]:
+            return {
+                "amount": projection["price_sale_amount"],
+                "currency": projection["currency"],
+            }
         else:
             return None
 
     @staticmethod
     def resolve_variant_price_final(root: CartLine, info: ResolveInfo):
-        if root.variant.is_visible and root.variant.product.is_visible:
-            return root.variant.price_sale
-        else:
-            return None
+        return CartMerchandiseType.resolve_variant_price_sale(root, info)
 
     @staticmethod
     def resolve_status(root: CartLine, info: ResolveInfo):
-        if root.variant.is_visible and root.variant.product.is_visible:
+        if root.merchandise_projection["is_visible"]:
             return "NORMAL"
         else:
             return "TAKEN OFF"
 
     @staticmethod
     def resolve_selected_option_values(root: CartLine, info: ResolveInfo):
-        selected_option_values = []
-
-        option_values = root.variant.selected_option_values.order_by(
-            "product_option__sort_key"
-        )
-        for option_value in option_values:
-            trans = option_value.translations.filter(
-                language_code=root.variant.product.organization.language_code
-            ).first()
-
-            if trans:
-                selected_option_values.append(trans.name)
-
-        return selected_option_values
+        return root.merchandise_projection["selected_option_values"]
 
     @staticmethod
     def resolve_translations(root: CartLine, info: ResolveInfo):
-        return root.variant.product.translations
+        loader = ProductTransLoader.from_context(info.context)
+        if is_running_async():
+            return loader.aload(root, info)
+
+        return loader.load(root, info)
 
 
 class CartLineFilter(FilterSet):
@@ -196,59 +168,87 @@ class CartLineNode(gql_optimizer.OptimizedDjangoObjectType):
 
     @classmethod
     def get_node(cls, info: ResolveInfo, id):
+        if is_running_async():
+            return cls.aget_node(info, id)
+
         if info.context.user.is_anonymous:
             raise ValidationError("This operation is not allowed!")
 
-        return (
-            cls._meta.model.objects.select_related(
-                "cart", "variant", "variant__product"
-            )
-            .filter(pk=id, cart__customer_id=info.context.user.id)
-            .first()
-        )
+        return cls.get_node_queryset(id, info.context.user.id).first()
+
+    @classmethod
+    async def aget_node(cls, info: ResolveInfo, id):
+        user = await aget_user(info.context)
+        if user.is_anonymous:
+            raise ValidationError("This operation is not allowed!")
+
+        return await cls.get_node_queryset(id, user.id).afirst()
+
+    @classmethod
+    def get_node_queryset(cls, id, customer_id):
+        return cls._meta.model.objects.select_related(
+            "cart", "variant", "variant__product"
+        ).filter(pk=id, cart__customer_id=customer_id)
 
     @staticmethod
     def resolve_merchandise(root: CartLine, info: ResolveInfo):
-        return root
+        loader = MerchandiseProjectionLoader.from_context(info.context)
+        if is_running_async():
+            return CartLineNode.aresolve_merchandise(root, info, loader)
+
+        root.merchandise_projection = loader.load(root, info)
+
+        return root if root.merchandise_projection else None
+
+    @staticmethod
+    async def aresolve_merchandise(
+        root: CartLine, info: ResolveInfo, loader: MerchandiseProjectionLoader
+    ):
+        root.merchandise_projection = await loader.aload(root, info)
+
+        return root if root.merchandise_projection else None
 
     @staticmethod
     def resolve_cost(root: CartLine, info: ResolveInfo):
-        if root.variant.price_amount is None:
-            amount = 0
-        else:
-            amount = root.variant.price_amount * root.quantity
+        if is_running_async():
+            return CartLineNode.aresolve_cost(root, info)
+
+        pricing, index = CartPricingHelper.for_cart_line(info.context, root)
+
+        return pricing.get_cost(index)
 
-        result = {
-            "amount": amount,
-            "currency": root.variant.currency,
-        }
+    @staticmethod
+    async def aresolve_cost(root: CartLine, info: ResolveInfo):
+        pricing, index = await CartPricingHelper.afor_cart_line(info.context, root)
 
-        return result
+        return pricing.get_cost(index)
 
     @staticmethod
     def resolve_cost_final(root: CartLine, info: ResolveInfo):
-        if root.variant.price_sale_amount is None:
-            amount = 0
-        else:
-            amount = root.variant.price_sale_amount * root.quantity
+        if is_running_async():
+            return CartLineNode.aresolve_cost_final(root, info)
+
+        pricing, index = CartPricingHelper.for_cart_line(info.context, root)
 
-        result = {
-            "amount": amount,
-            "currency": root.variant.currency,
-        }
+        return pricing.get_cost_sale(index)
+
+    @staticmethod
+    async def aresolve_cost_final(root: CartLine, info: ResolveInfo):
+        pricing, index = await CartPricingHelper.afor_cart_line(info.context, root)
 
-        return result
+        return pricing.get_cost_sale(index)
 
     @staticmethod
     def resolve_cost_sale(root: CartLine, info: ResolveInfo):
-        if root.variant.price_sale_amount is None:
-            amount = 0
-        else:
-            amount = root.variant.price_sale_amount * root.quantity
+        if is_running_async():
+            return CartLineNode.aresolve_cost_sale(root, info)
+
+        pricing, index = CartPricingHelper.for_cart_line(info.context, root)
 
-        result = {
-            "amount": amount,
-            "currency": root.variant.currency,
-        }
+        return pricing.get_cost_sale(index)
+
+    @staticmethod
+    async def aresolve_cost_sale(root: CartLine, info: ResolveInfo):
+        pricing, index = await CartPricingHelper.afor_cart_line(info.context, root)
 
-        return result
+        return pricing.get_cost_sale(index)
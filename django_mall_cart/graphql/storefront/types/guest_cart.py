@@ -0,0 +1,61 @@
+from graphene import ResolveInfo
+import graphene
+
+from django_app_core.types import Money
+from django_mall_cart.graphql.storefront.loaders import CartLineLoader
+from django_mall_cart.graphql.storefront.types.cart_line import (
+    CartLineNode,
+    CartMerchandiseType,
+)
+from django_mall_cart.helpers.async_helper import sync_when_async
+from django_mall_cart.helpers.guest_cart_helper import GuestCartHelper
+from django_mall_cart.models import CartLine
+
+
+class GuestCartLineType(graphene.ObjectType):
+    merchandise = graphene.Field(CartMerchandiseType)
+    quantity = graphene.Int(required=True)
+    cost = graphene.Field(Money, required=True)
+    cost_final = graphene.Field(Money, required=True)
+    cost_sale = graphene.Field(Money, required=True)
+
+    @staticmethod
+    def resolve_merchandise(root: CartLine, info: ResolveInfo):
+        return CartLineNode.resolve_merchandise(root, info)
+
+    @staticmethod
+    def resolve_cost(root: CartLine, info: ResolveInfo):
+        return CartLineNode.resolve_cost(root, info)
+
+    @staticmethod
+    def resolve_cost_final(root: CartLine, info: ResolveInfo):
+        return CartLineNode.resolve_cost_final(root, info)
+
+    @staticmethod
+    def resolve_cost_sale(root: CartLine, info: ResolveInfo):
+        return CartLineNode.resolve_cost_sale(root, info)
+
+
+class GuestCartType(graphene.ObjectType):
+    token = graphene.String(required=True)
+    cost_final = graphene.Field(Money, required=True)
+    quantity = graphene.Field(graphene.Int, required=True)
+    cart_lines = graphene.List(graphene.NonNull(GuestCartLineType), required=True)
+
+    @staticmethod
+    @sync_when_async
+    def resolve_cost_final(root: GuestCartHelper, info: ResolveInfo):
+        return root.get_cost_final()
+
+    @staticmethod
+    @sync_when_async
+    def resolve_quantity(root: GuestCartHelper, info: ResolveInfo):
+        return root.get_quantity()
+
+    @staticmethod
+    @sync_when_async
+    def resolve_cart_lines(root: GuestCartHelper, info: ResolveInfo):
+        cart_lines = root.get_cart_lines()
+        CartLineLoader.set_guest_cart_index(info.context, cart_lines)
+
+        return cart_lines
@@ -0,0 +1,37 @@
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+
+
+def is_running_async() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+
+    return True
+
+
+def sync_when_async(function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if is_running_async():
+            return sync_to_async(function)(*args, **kwargs)
+
+        return function(*args, **kwargs)
+
+    return wrapper
+
+
+async def aget_user(request):
+    if hasattr(request, "auser"):
+        return await request.auser()
+
+    def get_user():
+        user = request.user
+        # request.user is lazy and only hits the database on first access.
+        user.is_anonymous
+        return user
+
+    return await sync_to_async(get_user)()
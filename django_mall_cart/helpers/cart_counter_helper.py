@@ -0,0 +1,156 @@
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from django_mall_cart.helpers.cart_helper import CartHelper
+from django_mall_cart.models import Cart
+
+
+class CacheCounterStore:
+    def __init__(self, alias: str = "default"):
+        self.cache = caches[alias]
+
+    def get_many(self, keys: Iterable[str]) -> Dict:
+        return self.cache.get_many(list(keys))
+
+    def set_many(self, data: Dict, timeout: int) -> None:
+        self.cache.set_many(data, timeout)
+
+    def add_many(self, data: Dict, timeout: int) -> None:
+        for key, value in data.items():
+            self.cache.add(key, value, timeout)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        self.cache.delete_many(list(keys))
+
+
+class LocalCounterStore:
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str]) -> Dict:
+        now = time.monotonic()
+        with self.lock:
+            return {
+                key: self.data[key][0]
+                for key in keys
+                if key in self.data and self.data[key][1] > now
+            }
+
+    def set_many(self, data: Dict, timeout: int) -> None:
+        expires_at = time.monotonic() + timeout
+        with self.lock:
+            self.data.update({key: (value, expires_at) for key, value in data.items()})
+
+    def add_many(self, data: Dict, timeout: int) -> None:
+        now = time.monotonic()
+        with self.lock:
+            for key, value in data.items():
+                if key not in self.data or self.data[key][1] <= now:
+                    self.data[key] = (value, now + timeout)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        with self.lock:
+            for key in keys:
+                self.data.pop(key, None)
+
+
+def get_counter_store():
+    if getattr(settings, "CART_COUNTER_STORE", "cache") == "local":
+        return LocalCounterStore()
+
+    return CacheCounterStore(getattr(settings, "CART_COUNTER_CACHE", "default"))
+
+
+counter_store = get_counter_store()
+
+
+class CartCounterHelper:
+    @staticmethod
+    def get_timeout() -> int:
+        return getattr(settings, "CART_COUNTER_TIMEOUT", 60 * 60)
+
+    @staticmethod
+    def get_slug_key(organization_id, customer_id, slug: str) -> str:
+        return "cart:slug:" + str(organization_id) + ":" + str(customer_id) + ":" + slug
+
+    @staticmethod
+    def get_summary_key(cart_id) -> str:
+        return "cart:summary:" + str(cart_id)
+
+    @classmethod
+    def sync(cls, cart: Cart) -> None:
+        key = cls.get_summary_key(cart.pk)
+        if cart.is_summary_stale:
+            transaction.on_commit(lambda: counter_store.delete_many([key]))
+        else:
+            value = {"quantity": cart.quantity, "line_count": cart.line_count}
+            transaction.on_commit(
+                lambda: counter_store.set_many({key: value}, cls.get_timeout())
+            )
+
+    @classmethod
+    def invalidate(cls, cart_ids: Iterable) -> None:
+        keys = [cls.get_summary_key(cart_id) for cart_id in cart_ids]
+        if keys:
+            transaction.on_commit(lambda: counter_store.delete_many(keys))
+
+    @classmethod
+    def delete(cls, carts: Iterable[Cart]) -> None:
+        keys = []
+        for cart in carts:
+            keys.append(
+                cls.get_slug_key(cart.organization_id, cart.customer_id, cart.slug)
+            )
+            keys.append(cls.get_summary_key(cart.pk))
+        if keys:
+            transaction.on_commit(lambda: counter_store.delete_many(keys))
+
+    @classmethod
+    def get_summary(cls, organization_id, customer_id, slug: str) -> Optional[dict]:
+        slug_key = cls.get_slug_key(organization_id, customer_id, slug)
+        cart_id = counter_store.get_many([slug_key]).get(slug_key)
+        if cart_id is None:
+            cart_id = (
+                Cart.objects.filter(
+                    organization_id=organization_id, customer_id=customer_id, slug=slug
+                )
+                .values_list("id", flat=True)
+                .first()
+            )
+            if cart_id is None:
+                return None
+            counter_store.add_many({slug_key: cart_id}, cls.get_timeout())
+
+        summary_key = cls.get_summary_key(cart_id)
+        summary = counter_store.get_many([summary_key]).get(summary_key)
+        if summary is None:
+            cart = (
+                Cart.objects.only(
+                    "id",
+                    "organization",
+                    "line_count",
+                    "quantity",
+                    "is_summary_stale",
+                    "version",
+                )
+                .filter(pk=cart_id)
+                .first()
+            )
+            if cart is None:
+                counter_store.delete_many([slug_key])
+                return None
+            if cart.is_summary_stale:
+                CartHelper(cart=cart).refresh_summary()
+
+            # A mutation may have synced a newer summary since the cart was
+            # read, so the read value never overwrites it.
+            summary = {"quantity": cart.quantity, "line_count": cart.line_count}
+            counter_store.add_many({summary_key: summary}, cls.get_timeout())
+
+        return summary
@@ -1,34 +1,169 @@
+import asyncio
+import datetime
+from decimal import Decimal
 from typing import Tuple
 
 from django.conf import settings
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
 
 from graphql_relay import from_global_id
 
 from django_app_core.types import Money
-from django_mall_cart.models import Cart
+from django_mall_cart.helpers.cart_snapshot_helper import CartSnapshotHelper
+from django_mall_cart.helpers.instrumentation_helper import instrumentation
+from django_mall_cart.helpers.pricing_helper import CartPricingHelper
+from django_mall_cart.models import Cart, CartLine
 from django_mall_shipment.models import Shipment
 
 
 class CartHelper:
     def __init__(self, cart: Cart):
         self.cart = cart
-        self.organization = cart.organization
+        self.shipments = {}
+        self.shipment_tasks = {}
+        self.refresh_task = None
+
+    @classmethod
+    def from_context(cls, context, cart: Cart) -> "CartHelper":
+        cart_helpers = getattr(context, "_cart_helpers", None)
+        if cart_helpers is None:
+            cart_helpers = {}
+            setattr(context, "_cart_helpers", cart_helpers)
+
+        key = (cart.pk, cart.version)
+        if key not in cart_helpers:
+            cart_helpers[key] = cls(cart=cart)
+
+        return cart_helpers[key]
+
+    @staticmethod
+    def get_visible_q(prefix: str = "") -> Q:
+        today = datetime.date.today()
+
+        return (
+            Q(**{prefix + "deleted__isnull": True})
+            & Q(**{prefix + "is_published": True})
+            & (
+                Q(**{prefix + "published_at__lte": today})
+                | Q(**{prefix + "published_at__isnull": True})
+            )
+            & Q(**{prefix + "product__deleted__isnull": True})
+            & Q(**{prefix + "product__is_published": True})
+            & (
+                Q(**{prefix + "product__published_at__lte": today})
+                | Q(**{prefix + "product__published_at__isnull": True})
+            )
+        )
+
+    def compute_summary(self) -> Tuple[int, int, Decimal]:
+        if getattr(settings, "CART_SUMMARY_AGGREGATE", True):
+            return self.aggregate_summary()
+
+        cart_lines = list(self.cart.cartline_set.all())
+        pricing = CartPricingHelper(cart_lines)
+
+        return len(cart_lines), pricing.quantity_total, pricing.cost_final_total
+
+    async def acompute_summary(self) -> Tuple[int, int, Decimal]:
+        if getattr(settings, "CART_SUMMARY_AGGREGATE", True):
+            return await self.aaggregate_summary()
+
+        cart_lines = [
+            cart_line
+            async for cart_line in CartLine.objects.select_related(
+                "variant", "variant__product"
+            ).filter(cart_id=self.cart.pk)
+        ]
+        pricing = CartPricingHelper(cart_lines)
+
+        return len(cart_lines), pricing.quantity_total, pricing.cost_final_total
+
+    @classmethod
+    def get_summary_aggregates(cls) -> dict:
+        visible = cls.get_visible_q(prefix="variant__")
+        amount_field = DecimalField(max_digits=19, decimal_places=4)
+
+        return dict(
+            line_count=Count("pk"),
+            quantity=Coalesce(Sum("quantity", filter=visible), Value(0)),
+            cost_final_amount=Coalesce(
+                Sum(
+                    F("variant__price_sale_amount") * F("quantity"),
+                    filter=visible,
+                    output_field=amount_field,
+                ),
+                Value(Decimal(0)),
+                output_field=amount_field,
+            ),
+        )
+
+    def aggregate_summary(self) -> Tuple[int, int, Decimal]:
+        result = CartLine.objects.filter(cart_id=self.cart.pk).aggregate(
+            **self.get_summary_aggregates()
+        )
+
+        return (
+            result["line_count"],
+            result["quantity"],
+            result["cost_final_amount"],
+        )
+
+    async def aaggregate_summary(self) -> Tuple[int, int, Decimal]:
+        result = await CartLine.objects.filter(cart_id=self.cart.pk).aaggregate(
+            **self.get_summary_aggregates()
+        )
+
+        return (
+            result["line_count"],
+            result["quantity"],
+            result["cost_final_amount"],
+        )
+
+    @staticmethod
+    def get_summary(line_count: int, quantity: int, cost_final_amount) -> dict:
+        return {
+            "line_count": line_count,
+            "quantity": quantity,
+            "cost_final_amount": cost_final_amount,
+            "cost_final_currency": settings.DEFAULT_CURRENCY_CODE,
+            "is_summary_stale": False,
+        }
+
+    @instrumentation.instrument("cart.summary.refresh")
+    def refresh_summary(self) -> None:
+        summary = self.get_summary(*self.compute_summary())
+
+        Cart.objects.filter(pk=self.cart.pk, version=self.cart.version).update(
+            **summary
+        )
+        CartSnapshotHelper.delete_snapshot(self.cart.pk, self.cart.version)
+        for field, value in summary.items():
+            setattr(self.cart, field, value)
+
+    async def arefresh_summary(self) -> None:
+        if self.refresh_task is None:
+            self.refresh_task = asyncio.ensure_future(self.aupdate_summary())
+
+        await self.refresh_task
+
+    async def aupdate_summary(self) -> None:
+        summary = self.get_summary(*await self.acompute_summary())
+
+        await Cart.objects.filter(pk=self.cart.pk, version=self.cart.version).aupdate(
+            **summary
+        )
+        await CartSnapshotHelper.adelete_snapshot(self.cart.pk, self.cart.version)
+        for field, value in summary.items():
+            setattr(self.cart, field, value)
 
     def get_cost_final(self) -> Money:
-        cost_final_total = 0
-
-        cartline_set = self.cart.cartline_set.all()
-        for cartline in cartline_set:
-            if cartline.variant.is_visible and cartline.variant.product.is_visible:
-                cost_final_total = cost_final_total + (
-                    0
-                    if cartline.variant.price_sale_amount is None
-                    else cartline.variant.price_sale_amount * cartline.quantity
-                )
+        if self.cart.is_summary_stale:
+            self.refresh_summary()
 
         result = {
-            "amount": cost_final_total,
-            "currency": settings.DEFAULT_CURRENCY_CODE,
+            "amount": self.cart.cost_final_amount,
+            "currency": self.cart.cost_final_currency or settings.DEFAULT_CURRENCY_CODE,
         }
 
         return result
@@ -37,6 +172,13 @@ class CartHelper:
         if shipmentId is None:
             return True, 0, ""
 
+        if shipmentId not in self.shipments:
+            self.shipments[shipmentId] = self.find_cost_shipment(shipmentId)
+
+        return self.shipments[shipmentId]
+
+    @instrumentation.instrument("cart.shipment.find")
+    def find_cost_shipment(self, shipmentId) -> Tuple[bool, float, str]:
         try:
             _, shipment_id = from_global_id(shipmentId)
         except:
@@ -44,7 +186,7 @@ class CartHelper:
 
         shipment = (
             Shipment.objects.only("currency", "price_amount")
-            .filter(organization=self.organization, pk=shipment_id)
+            .filter(organization_id=self.cart.organization_id, pk=shipment_id)
             .first()
         )
         if shipment and shipment.is_visible:
@@ -68,11 +210,65 @@ class CartHelper:
             return False, 0, ""
 
     def get_quantity(self) -> int:
-        quantity_total = 0
+        if self.cart.is_summary_stale:
+            self.refresh_summary()
+
+        return self.cart.quantity
+
+    async def aget_cost_final(self) -> Money:
+        if self.cart.is_summary_stale:
+            await self.arefresh_summary()
+
+        result = {
+            "amount": self.cart.cost_final_amount,
+            "currency": self.cart.cost_final_currency or settings.DEFAULT_CURRENCY_CODE,
+        }
+
+        return result
+
+    async def aget_cost_shipment(self, shipmentId=None) -> Tuple[bool, float, str]:
+        if shipmentId is None:
+            return True, 0, ""
+
+        if shipmentId not in self.shipments:
+            if shipmentId not in self.shipment_tasks:
+                self.shipment_tasks[shipmentId] = asyncio.ensure_future(
+                    self.afind_cost_shipment(shipmentId)
+                )
+            self.shipments[shipmentId] = await self.shipment_tasks[shipmentId]
+
+        return self.shipments[shipmentId]
+
+    async def afind_cost_shipment(self, shipmentId) -> Tuple[bool, float, str]:
+        try:
+            _, shipment_id = from_global_id(shipmentId)
+        except:
+            return False, 0, ""
+
+        shipment = await Shipment.objects.filter(
+            organization_id=self.cart.organization_id, pk=shipment_id
+        ).afirst()
+        if shipment and shipment.is_visible:
+            return True, shipment.price_amount, shipment.currency
+
+        return False, 0, ""
+
+    async def aget_cost_total(self, shipmentId=None) -> Tuple[bool, float, str]:
+        (result_shipment, shipment_amount, _), cost_final = await asyncio.gather(
+            self.aget_cost_shipment(shipmentId=shipmentId), self.aget_cost_final()
+        )
+
+        amount = cost_final["amount"]
+
+        if result_shipment:
+            amount = amount + shipment_amount
+
+            return True, amount, settings.DEFAULT_CURRENCY_CODE
+        else:
+            return False, 0, ""
 
-        cartline_set = self.cart.cartline_set.all()
-        for cartline in cartline_set:
-            if cartline.variant.is_visible and cartline.variant.product.is_visible:
-                quantity_total = quantity_total + cartline.quantity
+    async def aget_quantity(self) -> int:
+        if self.cart.is_summary_stale:
+            await self.arefresh_summary()
 
-        return quantity_total
+        return self.cart.quantity
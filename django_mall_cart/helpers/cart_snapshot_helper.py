@@ -0,0 +1,134 @@
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from django_mall_cart.helpers.instrumentation_helper import instrumentation
+from django_mall_cart.models import Cart
+
+
+class CartSnapshotHelper:
+    CART_FIELDS = (
+        "id",
+        "organization_id",
+        "customer_id",
+        "slug",
+        "sort_key",
+        "line_count",
+        "quantity",
+        "cost_final_amount",
+        "cost_final_currency",
+        "is_summary_stale",
+        "version",
+        "created_at",
+        "updated_at",
+    )
+
+    @staticmethod
+    def get_version_key(cart_id) -> str:
+        return "cart:" + str(cart_id) + ":version"
+
+    @staticmethod
+    def get_snapshot_key(cart_id, version) -> str:
+        return "cart:" + str(cart_id) + ":" + str(version) + ":snapshot"
+
+    @classmethod
+    def set_version(cls, cart_id, version: int) -> None:
+        transaction.on_commit(
+            lambda: cache.set(cls.get_version_key(cart_id), version, None)
+        )
+
+    @classmethod
+    def sync_versions(cls, cart_ids: Iterable) -> None:
+        cache.set_many(
+            {
+                cls.get_version_key(cart_id): version
+                for cart_id, version in Cart.objects.filter(
+                    pk__in=cart_ids
+                ).values_list("pk", "version")
+            },
+            None,
+        )
+
+    @classmethod
+    def invalidate(cls, cart_ids: Iterable) -> None:
+        cart_ids = list(cart_ids)
+        if cart_ids:
+            transaction.on_commit(lambda: cls.sync_versions(cart_ids))
+
+    @classmethod
+    def delete(cls, cart_ids: Iterable) -> None:
+        keys = [cls.get_version_key(cart_id) for cart_id in cart_ids]
+        if keys:
+            transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @classmethod
+    def delete_snapshot(cls, cart_id, version: int) -> None:
+        transaction.on_commit(
+            lambda: cache.delete(cls.get_snapshot_key(cart_id, version))
+        )
+
+    @classmethod
+    async def adelete_snapshot(cls, cart_id, version: int) -> None:
+        await cache.adelete(cls.get_snapshot_key(cart_id, version))
+
+    @classmethod
+    def get_cart(cls, cart_id, customer_id) -> Optional[Cart]:
+        version = cache.get(cls.get_version_key(cart_id))
+        if version is None:
+            instrumentation.cache_result("snapshot", 0, 1)
+            return None
+
+        snapshot = cache.get(cls.get_snapshot_key(cart_id, version))
+        if snapshot is None:
+            instrumentation.cache_result("snapshot", 0, 1)
+            return None
+        instrumentation.cache_result("snapshot", 1, 0)
+
+        return cls.load_cart(snapshot, customer_id)
+
+    @classmethod
+    async def aget_cart(cls, cart_id, customer_id) -> Optional[Cart]:
+        version = await cache.aget(cls.get_version_key(cart_id))
+        if version is None:
+            instrumentation.cache_result("snapshot", 0, 1)
+            return None
+
+        snapshot = await cache.aget(cls.get_snapshot_key(cart_id, version))
+        if snapshot is None:
+            instrumentation.cache_result("snapshot", 0, 1)
+            return None
+        instrumentation.cache_result("snapshot", 1, 0)
+
+        return cls.load_cart(snapshot, customer_id)
+
+    @classmethod
+    def load_cart(cls, snapshot: dict, customer_id) -> Optional[Cart]:
+        cart = Cart.from_db(None, cls.CART_FIELDS, snapshot["cart"])
+        if str(cart.customer_id) != str(customer_id):
+            return None
+
+        return cart
+
+    @classmethod
+    def set_cart(cls, cart: Cart) -> None:
+        snapshot = {"cart": tuple(getattr(cart, field) for field in cls.CART_FIELDS)}
+
+        cache.set(
+            cls.get_snapshot_key(cart.pk, cart.version),
+            snapshot,
+            getattr(settings, "CART_SNAPSHOT_TIMEOUT", 300),
+        )
+        cache.add(cls.get_version_key(cart.pk), cart.version, None)
+
+    @classmethod
+    async def aset_cart(cls, cart: Cart) -> None:
+        snapshot = {"cart": tuple(getattr(cart, field) for field in cls.CART_FIELDS)}
+
+        await cache.aset(
+            cls.get_snapshot_key(cart.pk, cart.version),
+            snapshot,
+            getattr(settings, "CART_SNAPSHOT_TIMEOUT", 300),
+        )
+        await cache.aadd(cls.get_version_key(cart.pk), cart.version, None)
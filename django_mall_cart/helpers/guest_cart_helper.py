@@ -0,0 +1,128 @@
+from typing import List, Optional
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+
+from django_mall_cart.helpers.pricing_helper import CartPricingHelper
+from django_mall_cart.models import CartLine
+from django_mall_cart.services.cart_line_service import CartLineService
+from django_mall_cart.services.variant_eligibility_service import (
+    VariantEligibilityService,
+)
+from django_mall_product.models import Variant
+
+
+class GuestCartHelper:
+    SALT = "django_mall_cart.guest_cart"
+
+    def __init__(self, token: Optional[str] = None):
+        if token:
+            try:
+                self.key = signing.loads(
+                    token, salt=self.SALT, max_age=self.get_timeout()
+                )
+            except signing.BadSignature:
+                raise ValidationError("Bad Request!")
+            self.token = token
+        else:
+            self.key = uuid.uuid4().hex
+            self.token = signing.dumps(self.key, salt=self.SALT)
+
+        self.data = cache.get(self.get_cache_key()) or {
+            "organization_id": None,
+            "lines": {},
+        }
+        self.cart_lines = None
+
+    @staticmethod
+    def get_timeout() -> int:
+        return getattr(settings, "CART_GUEST_TIMEOUT", 60 * 60 * 24 * 30)
+
+    def get_cache_key(self) -> str:
+        return "cart:guest:" + self.key
+
+    @property
+    def organization_id(self):
+        return self.data["organization_id"]
+
+    @property
+    def lines(self) -> dict:
+        return self.data["lines"]
+
+    def save(self) -> None:
+        cache.set(self.get_cache_key(), self.data, self.get_timeout())
+        self.cart_lines = None
+
+    def delete(self) -> None:
+        cache.delete(self.get_cache_key())
+        self.data = {"organization_id": None, "lines": {}}
+        self.cart_lines = None
+
+    def set_lines(self, variantIdList: list, quantityList: list) -> dict:
+        results, items = CartLineService.decode_items(
+            variantIdList, quantityList, allow_zero=True
+        )
+
+        variant_ids = list({variant_id for variant_id, _ in items.values()})
+        eligibilities = VariantEligibilityService.get_eligibility(variant_ids)
+        organization_ids = dict(
+            (str(pk), organization_id)
+            for pk, organization_id in Variant.objects.filter(
+                pk__in=variant_ids
+            ).values_list("pk", "product__organization_id")
+        )
+
+        for index, (variant_id, quantity) in items.items():
+            variantId = results[index][0]
+            eligibility = eligibilities.get(variant_id)
+            organization_id = organization_ids.get(variant_id)
+            if quantity == 0:
+                if variant_id in self.lines:
+                    del self.lines[variant_id]
+                    results[index] = (variantId, "done")
+                else:
+                    results[index] = (variantId, "not_found")
+            elif eligibility is None or not eligibility.is_visible:
+                results[index] = (variantId, "not_found")
+            elif eligibility.is_protected:
+                results[index] = (variantId, "in_protected")
+            elif self.organization_id not in (None, organization_id):
+                results[index] = (variantId, "error")
+            else:
+                self.data["organization_id"] = organization_id
+                self.lines[variant_id] = quantity
+                results[index] = (variantId, "done")
+
+        if not self.lines:
+            self.data["organization_id"] = None
+        self.save()
+
+        return CartLineService.get_warnings(results)
+
+    def get_cart_lines(self) -> List[CartLine]:
+        if self.cart_lines is None:
+            variants = {
+                str(variant.pk): variant
+                for variant in Variant.objects.select_related(
+                    "product", "product__organization"
+                ).filter(pk__in=list(self.lines))
+            }
+            self.cart_lines = [
+                CartLine(variant=variants[variant_id], quantity=quantity)
+                for variant_id, quantity in self.lines.items()
+                if variant_id in variants
+            ]
+
+        return self.cart_lines
+
+    def get_quantity(self) -> int:
+        return CartPricingHelper(self.get_cart_lines()).quantity_total
+
+    def get_cost_final(self) -> dict:
+        return {
+            "amount": CartPricingHelper(self.get_cart_lines()).cost_final_total,
+            "currency": settings.DEFAULT_CURRENCY_CODE,
+        }
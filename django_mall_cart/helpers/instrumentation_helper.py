@@ -0,0 +1,242 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import logging
+import random
+import socket
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+
+
+logger = logging.getLogger("django_mall_cart.instrumentation")
+
+Tags = Tuple[Tuple[str, str], ...]
+
+sampled_var: ContextVar[Optional[bool]] = ContextVar("cart_sampled", default=None)
+
+
+def normalize_tags(tags: Optional[dict]) -> Tags:
+    return tuple(sorted((key, str(value)) for key, value in (tags or {}).items()))
+
+
+class LoggingSink:
+    def __init__(self, level: int = logging.INFO):
+        self.level = level
+
+    def emit(self, kind: str, name: str, value: float, tags: Tags) -> None:
+        logger.log(
+            self.level,
+            "%s %s=%s %s",
+            kind,
+            name,
+            value,
+            " ".join(key + "=" + tag for key, tag in tags),
+        )
+
+
+class PrometheusSink:
+    def __init__(self, namespace: str = "cart"):
+        self.namespace = namespace
+        self.counters = defaultdict(float)
+        self.summaries = defaultdict(lambda: [0, 0.0])
+        self.lock = threading.Lock()
+
+    def emit(self, kind: str, name: str, value: float, tags: Tags) -> None:
+        metric = self.namespace + "_" + name.replace(".", "_")
+        with self.lock:
+            if kind == "counter":
+                self.counters[(metric + "_total", tags)] += value
+            else:
+                summary = self.summaries[(metric, tags)]
+                summary[0] += 1
+                summary[1] += value
+
+    @staticmethod
+    def format_tags(tags: Tags) -> str:
+        if not tags:
+            return ""
+
+        return (
+            "{"
+            + ",".join(
+                key + '="' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+                for key, value in tags
+            )
+            + "}"
+        )
+
+    def render(self) -> str:
+        lines = []
+        with self.lock:
+            for (metric, tags), value in sorted(self.counters.items()):
+                lines.append(metric + self.format_tags(tags) + " " + repr(value))
+            for (metric, tags), (count, total) in sorted(self.summaries.items()):
+                lines.append(
+                    metric + "_count" + self.format_tags(tags) + " " + str(count)
+                )
+                lines.append(
+                    metric + "_sum" + self.format_tags(tags) + " " + repr(total)
+                )
+
+        return "\n".join(lines) + "\n"
+
+
+class StatsDSink:
+    TYPES = {"counter": "c", "timing": "ms", "histogram": "h"}
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8125, prefix: str = "cart"):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def format(self, kind: str, name: str, value: float, tags: Tags) -> str:
+        if kind == "timing":
+            value = value * 1000
+        line = self.prefix + "." + name + ":" + ("%g" % value) + "|" + self.TYPES[kind]
+        if tags:
+            line = line + "|#" + ",".join(key + ":" + tag for key, tag in tags)
+
+        return line
+
+    def send(self, line: str) -> None:
+        try:
+            self.socket.sendto(line.encode(), self.address)
+        except OSError:
+            pass
+
+    def emit(self, kind: str, name: str, value: float, tags: Tags) -> None:
+        self.send(self.format(kind, name, value, tags))
+
+
+class LocalStatsDSink(StatsDSink):
+    def __init__(self, prefix: str = "cart", maxlen: int = 10000):
+        self.prefix = prefix
+        self.maxlen = maxlen
+        self.lines = []
+        self.lock = threading.Lock()
+
+    def send(self, line: str) -> None:
+        with self.lock:
+            self.lines.append(line)
+            del self.lines[: -self.maxlen]
+
+
+class Instrumentation:
+    def __init__(self, sinks: List, sample_rate: float = 1.0):
+        self.sinks = sinks
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_settings(cls) -> "Instrumentation":
+        config = getattr(settings, "CART_INSTRUMENTATION", {})
+
+        sinks = []
+        for name in config.get("sinks", []):
+            if name == "logging":
+                sinks.append(LoggingSink())
+            elif name == "prometheus":
+                sinks.append(PrometheusSink())
+            elif name == "statsd":
+                sinks.append(StatsDSink(**config.get("statsd", {})))
+            elif name == "statsd_local":
+                sinks.append(LocalStatsDSink())
+
+        return cls(sinks=sinks, sample_rate=config.get("sample_rate", 1.0))
+
+    def get_sink(self, sink_class):
+        for sink in self.sinks:
+            if isinstance(sink, sink_class):
+                return sink
+
+        return None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.sinks)
+
+    def sample(self) -> bool:
+        return self.enabled and random.random() < self.sample_rate
+
+    def is_sampled(self) -> bool:
+        sampled = sampled_var.get()
+        if sampled is not None:
+            return sampled
+
+        return self.sample()
+
+    @contextmanager
+    def sampling(self, sampled: Optional[bool] = None):
+        if sampled is None:
+            sampled = self.sample()
+        token = sampled_var.set(sampled)
+        try:
+            yield sampled
+        finally:
+            sampled_var.reset(token)
+
+    def emit(self, kind: str, name: str, value: float, **tags) -> None:
+        if not self.is_sampled():
+            return
+
+        tags = normalize_tags(tags)
+        for sink in self.sinks:
+            sink.emit(kind, name, value, tags)
+
+    def increment(self, name: str, value: float = 1, **tags) -> None:
+        self.emit("counter", name, value, **tags)
+
+    def histogram(self, name: str, value: float, **tags) -> None:
+        self.emit("histogram", name, value, **tags)
+
+    def timing(self, name: str, seconds: float, **tags) -> None:
+        self.emit("timing", name, seconds, **tags)
+
+    def cache_result(self, name: str, hits: int, misses: int) -> None:
+        if hits:
+            self.increment("cache.hit", hits, cache=name)
+        if misses:
+            self.increment("cache.miss", misses, cache=name)
+
+    @contextmanager
+    def track(self, name: str, **tags):
+        if not self.is_sampled():
+            yield
+            return
+
+        queries = {"count": 0, "seconds": 0.0}
+
+        def count_query(execute, sql, params, many, context):
+            started_at = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries["count"] += 1
+                queries["seconds"] += time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        with connection.execute_wrapper(count_query):
+            try:
+                yield
+            finally:
+                self.timing(name, time.perf_counter() - started_at, **tags)
+                self.histogram("sql.count", queries["count"], target=name, **tags)
+                self.timing("sql.time", queries["seconds"], target=name, **tags)
+
+    def instrument(self, name: str):
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.track(name):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+instrumentation = Instrumentation.from_settings()
@@ -0,0 +1,48 @@
+from collections import OrderedDict
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+
+class LocalTTLCache:
+    def __init__(self, maxsize: int = 1024, timeout: int = 60):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str]) -> Dict:
+        now = time.monotonic()
+        result = {}
+        with self.lock:
+            for key in keys:
+                item = self.data.get(key)
+                if item is None:
+                    continue
+                if item[0] <= now:
+                    del self.data[key]
+                    continue
+
+                self.data.move_to_end(key)
+                result[key] = item[1]
+
+        return result
+
+    def set_many(self, data: Dict, timeout: Optional[int] = None) -> None:
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        expires_at = time.monotonic() + timeout
+        with self.lock:
+            for key, value in data.items():
+                self.data[key] = (expires_at, value)
+                self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        with self.lock:
+            for key in keys:
+                self.data.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.data.clear()
@@ -0,0 +1,123 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+
+from asgiref.sync import sync_to_async
+
+from django_mall_cart.helpers.instrumentation_helper import instrumentation
+from django_mall_cart.helpers.local_cache_helper import LocalTTLCache
+
+
+local_cache = LocalTTLCache(
+    maxsize=getattr(settings, "CART_PHOTO_URL_LOCAL_CACHE_SIZE", 1024),
+    timeout=getattr(settings, "CART_PHOTO_URL_LOCAL_CACHE_TIMEOUT", 60),
+)
+
+
+class PhotoUrlHelper:
+    def __init__(self):
+        self.timeout = int(settings.AWS_QUERYSTRING_EXPIRE) - 600
+        self.trust_record = getattr(settings, "CART_PHOTO_URL_TRUST_RECORD", False)
+        self.max_workers = getattr(settings, "CART_PHOTO_URL_MAX_WORKERS", 8)
+
+    @staticmethod
+    def build_key(organization_id, product_id, s3_key: str) -> str:
+        return (
+            str(organization_id).replace("-", "")
+            + "/product/"
+            + str(product_id).replace("-", "")
+            + "/img-"
+            + s3_key
+        )
+
+    def sign(self, s3_key: str) -> Optional[str]:
+        if not self.trust_record and not default_storage.exists(s3_key):
+            return None
+
+        return default_storage.url(s3_key)
+
+    def get_urls_by_key(self, s3_keys: Dict[str, str]) -> Dict[str, Optional[str]]:
+        if not s3_keys:
+            return {}
+
+        urls = local_cache.get_many(s3_keys)
+        instrumentation.cache_result(
+            "photo_url.local", len(urls), len(s3_keys) - len(urls)
+        )
+
+        missing = [key for key in s3_keys if key not in urls]
+        if missing:
+            shared = cache.get_many(missing)
+            local_cache.set_many(shared)
+            urls.update(shared)
+            instrumentation.cache_result(
+                "photo_url.shared", len(shared), len(missing) - len(shared)
+            )
+
+        missing = [key for key in s3_keys if key not in urls]
+        if missing:
+            instrumentation.histogram("photo_url.sign_batch_size", len(missing))
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(len(missing), self.max_workers))
+            ) as executor:
+                signed = dict(
+                    zip(
+                        missing,
+                        executor.map(self.sign, [s3_keys[key] for key in missing]),
+                    )
+                )
+            signed = {key: url for key, url in signed.items() if url}
+            if signed:
+                cache.set_many(signed, self.timeout)
+                local_cache.set_many(signed, self.timeout)
+            urls.update(signed)
+
+        return {key: urls.get(key) for key in s3_keys}
+
+    async def asign(self, semaphore: asyncio.Semaphore, s3_key: str) -> Optional[str]:
+        async with semaphore:
+            return await sync_to_async(self.sign, thread_sensitive=False)(s3_key)
+
+    async def aget_urls_by_key(
+        self, s3_keys: Dict[str, str]
+    ) -> Dict[str, Optional[str]]:
+        if not s3_keys:
+            return {}
+
+        urls = local_cache.get_many(s3_keys)
+        instrumentation.cache_result(
+            "photo_url.local", len(urls), len(s3_keys) - len(urls)
+        )
+
+        missing = [key for key in s3_keys if key not in urls]
+        if missing:
+            shared = await cache.aget_many(missing)
+            local_cache.set_many(shared)
+            urls.update(shared)
+            instrumentation.cache_result(
+                "photo_url.shared", len(shared), len(missing) - len(shared)
+            )
+
+        missing = [key for key in s3_keys if key not in urls]
+        if missing:
+            instrumentation.histogram("photo_url.sign_batch_size", len(missing))
+            semaphore = asyncio.Semaphore(self.max_workers)
+            signed = dict(
+                zip(
+                    missing,
+                    await asyncio.gather(
+                        *[self.asign(semaphore, s3_keys[key]) for key in missing]
+                    ),
+                )
+            )
+            signed = {key: url for key, url in signed.items() if url}
+            if signed:
+                await cache.aset_many(signed, self.timeout)
+                local_cache.set_many(signed, self.timeout)
+            urls.update(signed)
+
+        return {key: urls.get(key) for key in s3_keys}
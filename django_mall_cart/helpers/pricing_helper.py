@@ -0,0 +1,217 @@
+import asyncio
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+
+from django_mall_cart.models import CartLine
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+SCALE = 10000
+SCALE_EXPONENT = -4
+INT64_MAX = 2**63 - 1
+
+
+class CartPricingHelper:
+    def __init__(self, cart_lines: List[CartLine]):
+        self.index = {}
+        self.currencies = []
+        prices = []
+        sale_prices = []
+        quantities = []
+        visibles = []
+        for index, cart_line in enumerate(cart_lines):
+            variant = cart_line.variant
+            self.index[cart_line.pk] = index
+            self.currencies.append(variant.currency)
+            prices.append(variant.price_amount)
+            sale_prices.append(variant.price_sale_amount)
+            quantities.append(cart_line.quantity)
+            visibles.append(self.is_visible(variant))
+
+        threshold = getattr(settings, "CART_PRICING_NUMPY_THRESHOLD", 500)
+        result = None
+        if numpy is not None and len(quantities) >= threshold:
+            result = self.compute_numpy(prices, sale_prices, quantities, visibles)
+        if result is None:
+            result = self.compute(prices, sale_prices, quantities, visibles)
+
+        self.costs, self.cost_sales, self.cost_final_total, self.quantity_total = result
+
+    @staticmethod
+    def is_visible(variant) -> bool:
+        return (
+            variant.deleted is None
+            and variant.product.deleted is None
+            and variant.is_visible
+            and variant.product.is_visible
+        )
+
+    @staticmethod
+    def compute(
+        prices: List[Optional[Decimal]],
+        sale_prices: List[Optional[Decimal]],
+        quantities: List[int],
+        visibles: List[bool],
+    ) -> Tuple[List[Decimal], List[Decimal], Decimal, int]:
+        costs = []
+        cost_sales = []
+        cost_final_total = Decimal(0)
+        quantity_total = 0
+        for price, sale_price, quantity, visible in zip(
+            prices, sale_prices, quantities, visibles
+        ):
+            cost = Decimal(0) if price is None else price * quantity
+            cost_sale = Decimal(0) if sale_price is None else sale_price * quantity
+            costs.append(cost)
+            cost_sales.append(cost_sale)
+            if visible:
+                cost_final_total = cost_final_total + cost_sale
+                quantity_total = quantity_total + quantity
+
+        return costs, cost_sales, cost_final_total, quantity_total
+
+    @staticmethod
+    def to_scaled(amounts: List[Optional[Decimal]]):
+        scaled = []
+        for amount in amounts:
+            if amount is None:
+                scaled.append(0)
+                continue
+
+            value = Decimal(amount) * SCALE
+            if value != value.to_integral_value() or abs(value) > INT64_MAX:
+                return None
+            scaled.append(int(value))
+
+        return numpy.array(scaled, dtype=numpy.int64)
+
+    @classmethod
+    def compute_numpy(
+        cls,
+        prices: List[Optional[Decimal]],
+        sale_prices: List[Optional[Decimal]],
+        quantities: List[int],
+        visibles: List[bool],
+    ) -> Optional[Tuple[List[Decimal], List[Decimal], Decimal, int]]:
+        scaled_prices = cls.to_scaled(prices)
+        scaled_sale_prices = cls.to_scaled(sale_prices)
+        if scaled_prices is None or scaled_sale_prices is None:
+            return None
+
+        # NumPy wraps around silently, so fall back to Decimal when a line
+        # cost or the total could leave the int64 range.
+        largest = max(
+            int(numpy.abs(scaled_prices).max(initial=0)),
+            int(numpy.abs(scaled_sale_prices).max(initial=0)),
+        )
+        if largest * sum(abs(quantity) for quantity in quantities) > INT64_MAX:
+            return None
+
+        quantity_array = numpy.array(quantities, dtype=numpy.int64)
+        visible_array = numpy.array(visibles, dtype=bool)
+
+        cost_array = scaled_prices * quantity_array
+        cost_sale_array = scaled_sale_prices * quantity_array
+
+        return (
+            [Decimal(int(value)).scaleb(SCALE_EXPONENT) for value in cost_array],
+            [Decimal(int(value)).scaleb(SCALE_EXPONENT) for value in cost_sale_array],
+            Decimal(int(cost_sale_array[visible_array].sum())).scaleb(SCALE_EXPONENT),
+            int(quantity_array[visible_array].sum()),
+        )
+
+    @staticmethod
+    def is_loaded(cart_line: CartLine) -> bool:
+        if not CartLine.variant.is_cached(cart_line):
+            return False
+
+        return type(cart_line.variant).product.is_cached(cart_line.variant)
+
+    @classmethod
+    def for_loaded_cart_line(
+        cls, context, cart_line: CartLine
+    ) -> Tuple["CartPricingHelper", int]:
+        if cart_line.pk is None:
+            return cls([cart_line]), 0
+
+        pricings = getattr(context, "_cart_line_pricings", None)
+        if pricings is None:
+            pricings = {}
+            setattr(context, "_cart_line_pricings", pricings)
+
+        if cart_line.pk not in pricings:
+            pricings[cart_line.pk] = cls([cart_line])
+
+        return pricings[cart_line.pk], 0
+
+    @classmethod
+    def for_cart_line(
+        cls, context, cart_line: CartLine
+    ) -> Tuple["CartPricingHelper", int]:
+        if cart_line.cart_id is None or cls.is_loaded(cart_line):
+            return cls.for_loaded_cart_line(context, cart_line)
+
+        pricings = getattr(context, "_cart_pricings", None)
+        if pricings is None:
+            pricings = {}
+            setattr(context, "_cart_pricings", pricings)
+
+        pricing = pricings.get(cart_line.cart_id)
+        if pricing is None or cart_line.pk not in pricing.index:
+            pricing = cls(
+                list(
+                    CartLine.objects.select_related(
+                        "variant", "variant__product"
+                    ).filter(cart_id=cart_line.cart_id)
+                )
+            )
+            pricings[cart_line.cart_id] = pricing
+            if cart_line.pk not in pricing.index:
+                return cls([cart_line]), 0
+
+        return pricing, pricing.index[cart_line.pk]
+
+    @classmethod
+    async def aload(cls, cart_id) -> "CartPricingHelper":
+        return cls(
+            [
+                cart_line
+                async for cart_line in CartLine.objects.select_related(
+                    "variant", "variant__product"
+                ).filter(cart_id=cart_id)
+            ]
+        )
+
+    @classmethod
+    async def afor_cart_line(
+        cls, context, cart_line: CartLine
+    ) -> Tuple["CartPricingHelper", int]:
+        if cart_line.cart_id is None or cls.is_loaded(cart_line):
+            return cls.for_loaded_cart_line(context, cart_line)
+
+        tasks = getattr(context, "_cart_pricing_tasks", None)
+        if tasks is None:
+            tasks = {}
+            setattr(context, "_cart_pricing_tasks", tasks)
+
+        if cart_line.cart_id not in tasks:
+            tasks[cart_line.cart_id] = asyncio.ensure_future(
+                cls.aload(cart_line.cart_id)
+            )
+        pricing = await tasks[cart_line.cart_id]
+        if cart_line.pk not in pricing.index:
+            return cls([cart_line]), 0
+
+        return pricing, pricing.index[cart_line.pk]
+
+    def get_cost(self, index: int) -> dict:
+        return {"amount": self.costs[index], "currency": self.currencies[index]}
+
+    def get_cost_sale(self, index: int) -> dict:
+        return {"amount": self.cost_sales[index], "currency": self.currencies[index]}
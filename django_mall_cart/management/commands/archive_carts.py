@@ -0,0 +1,58 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from django_mall_cart.services.cart_archive_service import CartArchiveService
+
+
+class Command(BaseCommand):
+    help = "Export and hard-delete soft-deleted and abandoned carts and cart lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--deleted-days",
+            type=int,
+            default=30,
+            help="Purge rows soft-deleted more than this many days ago.",
+        )
+        parser.add_argument(
+            "--abandoned-days",
+            type=int,
+            default=None,
+            help="Also purge carts not updated for this many days.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to wait between batches.",
+        )
+        parser.add_argument(
+            "--export",
+            default=None,
+            help="Append the purged rows to this gzip-compressed JSONL file.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+
+        abandoned_before = None
+        if options["abandoned_days"] is not None:
+            abandoned_before = now - datetime.timedelta(days=options["abandoned_days"])
+
+        cart_archive_service = CartArchiveService(
+            deleted_before=now - datetime.timedelta(days=options["deleted_days"]),
+            abandoned_before=abandoned_before,
+            batch_size=options["batch_size"],
+            sleep=options["sleep"],
+            export_path=options["export"],
+            dry_run=options["dry_run"],
+        )
+        result = cart_archive_service.archive()
+
+        self.stdout.write(
+            "Archived %d carts and %d cart lines." % (result["carts"], result["lines"])
+        )
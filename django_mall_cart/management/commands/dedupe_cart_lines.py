@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from django_mall_cart.models import CartLine
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge duplicate live cart lines of the same cart and variant. Run it "
+        "before migrating the cart_cartline_live_variant_uniq constraint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        duplicates = list(
+            CartLine.objects.order_by()
+            .values_list("cart_id", "variant_id")
+            .annotate(count=Count("pk"))
+            .filter(count__gt=1)
+        )
+
+        merged = 0
+        for start in range(0, len(duplicates), batch_size):
+            chunk = duplicates[start : start + batch_size]
+            merged = merged + self.merge(chunk, options["dry_run"])
+
+        self.stdout.write(
+            "Merged %d duplicate cart lines into %d cart lines."
+            % (merged, len(duplicates))
+        )
+
+    @transaction.atomic
+    def merge(self, chunk, dry_run: bool) -> int:
+        condition = Q()
+        for cart_id, variant_id, _ in chunk:
+            condition |= Q(cart_id=cart_id, variant_id=variant_id)
+
+        kept = {}
+        duplicates = []
+        for cart_line in (
+            CartLine.objects.select_for_update()
+            .only("id", "cart_id", "variant_id", "quantity", "created_at")
+            .filter(condition)
+            .order_by("created_at", "pk")
+        ):
+            key = (cart_line.cart_id, cart_line.variant_id)
+            if key in kept:
+                kept[key].quantity = kept[key].quantity + cart_line.quantity
+                duplicates.append(cart_line.pk)
+            else:
+                kept[key] = cart_line
+
+        if dry_run or not duplicates:
+            return len(duplicates)
+
+        now = timezone.now()
+        for cart_line in kept.values():
+            cart_line.updated_at = now
+        CartLine.objects.bulk_update(kept.values(), ["quantity", "updated_at"])
+        CartLine.objects.filter(pk__in=duplicates).update(
+            deleted=now, deleted_by_cascade=False, updated_at=now
+        )
+
+        return len(duplicates)
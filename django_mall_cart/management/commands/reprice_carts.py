@@ -0,0 +1,34 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from django_mall_cart.services.cart_repricing_service import CartRepricingService
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored totals of stale carts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--variant",
+            action="append",
+            default=[],
+            help="Reprice carts holding this variant instead of the stale carts.",
+        )
+        parser.add_argument(
+            "--published-since",
+            type=datetime.date.fromisoformat,
+            help="Reprice carts holding variants or products published after this date.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        cart_repricing_service = CartRepricingService(batch_size=options["batch_size"])
+        if options["variant"]:
+            count = cart_repricing_service.reprice(options["variant"])
+        elif options["published_since"]:
+            count = cart_repricing_service.reprice_published(options["published_since"])
+        else:
+            count = cart_repricing_service.reprice_stale()
+
+        self.stdout.write("Repriced %d carts." % count)
@@ -3,6 +3,7 @@ import uuid
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import Q
 
 from safedelete.models import SOFT_DELETE_CASCADE
 
@@ -18,6 +19,12 @@ class Cart(CommonDateAndSafeDeleteMixin):
     customer = models.ForeignKey(User, models.CASCADE)
     slug = models.CharField(max_length=255, db_index=True)
     sort_key = models.IntegerField(db_index=True, null=True)
+    line_count = models.IntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    cost_final_amount = models.DecimalField(max_digits=19, decimal_places=4, default=0)
+    cost_final_currency = models.CharField(max_length=3, null=True)
+    is_summary_stale = models.BooleanField(default=True)
+    version = models.PositiveIntegerField(default=0)
 
     _safedelete_policy = SOFT_DELETE_CASCADE
 
@@ -25,6 +32,17 @@ class Cart(CommonDateAndSafeDeleteMixin):
         db_table = settings.APP_NAME + "_cart_cart"
         get_latest_by = "updated_at"
         index_together = (("organization", "slug"),)
+        indexes = [
+            models.Index(
+                fields=["customer", "updated_at", "id"],
+                name="cart_cart_customer_seek_idx",
+            ),
+            models.Index(
+                fields=["customer", "organization", "slug"],
+                condition=Q(deleted__isnull=True),
+                name="cart_cart_live_slug_idx",
+            ),
+        ]
         unique_together = [["organization", "customer", "slug"]]
         ordering = ["sort_key"]
 
@@ -36,7 +54,7 @@ class CartLine(CommonDateAndSafeDeleteMixin):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     cart = models.ForeignKey(Cart, models.CASCADE)
     variant = models.ForeignKey(Variant, models.CASCADE)
-    quantity = models.IntegerField(db_index=True, validators=[MinValueValidator(1)])
+    quantity = models.IntegerField(validators=[MinValueValidator(1)])
 
     _safedelete_policy = SOFT_DELETE_CASCADE
 
@@ -44,6 +62,19 @@ class CartLine(CommonDateAndSafeDeleteMixin):
         db_table = settings.APP_NAME + "_cart_cartline"
         get_latest_by = "updated_at"
         ordering = ["updated_at"]
+        indexes = [
+            models.Index(
+                fields=["cart", "updated_at", "id"],
+                name="cart_cartline_cart_seek_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cart", "variant"],
+                condition=Q(deleted__isnull=True),
+                name="cart_cartline_live_variant_uniq",
+            ),
+        ]
 
     def __str__(self):
         return str(self.id)
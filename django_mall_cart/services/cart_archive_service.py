@@ -0,0 +1,188 @@
+import datetime
+import gzip
+import json
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, QuerySet
+
+from safedelete.models import HARD_DELETE
+
+from django_mall_cart.helpers.cart_counter_helper import CartCounterHelper
+from django_mall_cart.helpers.cart_snapshot_helper import CartSnapshotHelper
+from django_mall_cart.models import Cart, CartLine
+from django_mall_cart.services.cart_service import cart_id_cache
+
+
+CART_FIELDS = (
+    "id",
+    "organization_id",
+    "customer_id",
+    "slug",
+    "line_count",
+    "quantity",
+    "cost_final_amount",
+    "cost_final_currency",
+    "created_at",
+    "updated_at",
+    "deleted",
+)
+CART_LINE_FIELDS = (
+    "id",
+    "cart_id",
+    "variant_id",
+    "quantity",
+    "created_at",
+    "updated_at",
+    "deleted",
+)
+
+
+class CartArchiveService:
+    def __init__(
+        self,
+        deleted_before: datetime.datetime,
+        abandoned_before: Optional[datetime.datetime] = None,
+        batch_size: int = 500,
+        sleep: float = 0,
+        export_path: Optional[str] = None,
+        dry_run: bool = False,
+    ):
+        self.deleted_before = deleted_before
+        self.abandoned_before = abandoned_before
+        self.batch_size = batch_size
+        self.sleep = sleep
+        self.export_path = export_path
+        self.dry_run = dry_run
+
+    def iter_chunks(self, queryset: QuerySet, fields: tuple) -> Iterator[List[dict]]:
+        last_pk = None
+        while True:
+            chunk_queryset = queryset.order_by("pk")
+            if last_pk is not None:
+                chunk_queryset = chunk_queryset.filter(pk__gt=last_pk)
+
+            chunk = list(chunk_queryset.values(*fields)[: self.batch_size])
+            if not chunk:
+                return
+
+            yield chunk
+
+            if len(chunk) < self.batch_size:
+                return
+            last_pk = chunk[-1]["id"]
+
+    def export(self, model: str, rows: List[dict]) -> None:
+        if not self.export_path:
+            return
+
+        with gzip.open(self.export_path, "at", encoding="utf-8") as file:
+            for row in rows:
+                file.write(json.dumps({"model": model, **row}, default=str) + "\n")
+
+    def purge(self, model, name: str, queryset: QuerySet, fields: tuple) -> int:
+        count = 0
+        for chunk in self.iter_chunks(queryset, fields):
+            self.export(name, chunk)
+
+            if not self.dry_run:
+                with transaction.atomic():
+                    model.all_objects.filter(
+                        pk__in=[row["id"] for row in chunk]
+                    ).delete(force_policy=HARD_DELETE)
+
+            count = count + len(chunk)
+            if self.sleep:
+                time.sleep(self.sleep)
+
+        return count
+
+    def purge_carts(self) -> Tuple[int, int]:
+        carts = 0
+        lines = 0
+        for chunk in self.iter_chunks(self.get_expired_carts(), ("id",)):
+            with transaction.atomic():
+                # Lock the carts and check them again, so a cart touched since
+                # the chunk was read is kept together with its lines.
+                cart_rows = list(
+                    self.get_expired_carts()
+                    .select_for_update()
+                    .filter(pk__in=[row["id"] for row in chunk])
+                    .order_by("pk")
+                    .values(*CART_FIELDS)
+                )
+                cart_ids = [row["id"] for row in cart_rows]
+
+                for line_rows in self.iter_chunks(
+                    CartLine.all_objects.filter(cart_id__in=cart_ids).exclude(
+                        deleted__lt=self.deleted_before
+                    ),
+                    CART_LINE_FIELDS,
+                ):
+                    self.export("cartline", line_rows)
+                    if not self.dry_run:
+                        CartLine.all_objects.filter(
+                            pk__in=[row["id"] for row in line_rows]
+                        ).delete(force_policy=HARD_DELETE)
+                    lines = lines + len(line_rows)
+
+                self.export("cart", cart_rows)
+                if not self.dry_run:
+                    Cart.all_objects.filter(pk__in=cart_ids).delete(
+                        force_policy=HARD_DELETE
+                    )
+                    self.clear_caches(cart_rows)
+                carts = carts + len(cart_rows)
+
+            if self.sleep:
+                time.sleep(self.sleep)
+
+        return carts, lines
+
+    @staticmethod
+    def clear_caches(rows: List[dict]) -> None:
+        carts = [
+            Cart(
+                id=row["id"],
+                organization_id=row["organization_id"],
+                customer_id=row["customer_id"],
+                slug=row["slug"],
+            )
+            for row in rows
+        ]
+        CartSnapshotHelper.delete([cart.pk for cart in carts])
+        CartCounterHelper.delete(carts)
+
+        keys = [
+            (str(cart.organization_id), str(cart.customer_id), cart.slug)
+            for cart in carts
+        ]
+        transaction.on_commit(lambda: cart_id_cache.delete_many(keys))
+
+    def get_expired_carts(self) -> QuerySet:
+        condition = Q(deleted__lt=self.deleted_before)
+        if self.abandoned_before is not None:
+            # Summary writes don't touch Cart.updated_at, so a cart is only
+            # abandoned when none of its lines changed since the cutoff either.
+            condition = condition | (
+                Q(updated_at__lt=self.abandoned_before)
+                & ~Exists(
+                    CartLine.all_objects.filter(
+                        cart_id=OuterRef("pk"), updated_at__gte=self.abandoned_before
+                    )
+                )
+            )
+
+        return Cart.all_objects.filter(condition)
+
+    def archive(self) -> dict:
+        lines = self.purge(
+            CartLine,
+            "cartline",
+            CartLine.all_objects.filter(deleted__lt=self.deleted_before),
+            CART_LINE_FIELDS,
+        )
+        carts, cart_lines = self.purge_carts()
+
+        return {"carts": carts, "lines": lines + cart_lines}
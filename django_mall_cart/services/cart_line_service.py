@@ -0,0 +1,441 @@
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from graphql_relay import from_global_id
+from safedelete.signals import post_softdelete, pre_softdelete
+
+from django_mall_cart.helpers.cart_counter_helper import CartCounterHelper
+from django_mall_cart.helpers.cart_snapshot_helper import CartSnapshotHelper
+from django_mall_cart.helpers.instrumentation_helper import instrumentation
+from django_mall_cart.helpers.pricing_helper import CartPricingHelper
+from django_mall_cart.models import Cart, CartLine
+from django_mall_cart.services.variant_eligibility_service import (
+    VariantEligibility,
+    VariantEligibilityService,
+)
+from django_mall_product.models import Variant
+
+
+SUMMARY_FIELDS = (
+    "line_count",
+    "quantity",
+    "cost_final_amount",
+    "cost_final_currency",
+    "is_summary_stale",
+    "version",
+)
+
+
+class CartLineService:
+    def __init__(self, cart: Cart):
+        self.cart = cart
+
+    @staticmethod
+    def get_warnings(results: List[Tuple[str, str]]) -> dict:
+        warnings = {
+            "done": [],
+            "in_protected": [],
+            "in_use": [],
+            "not_found": [],
+            "error": [],
+        }
+        for variantId, status in results:
+            warnings[status].append(variantId)
+
+        return warnings
+
+    @staticmethod
+    def decode_variant_id(variantId) -> Optional[str]:
+        if not isinstance(variantId, str):
+            return None
+
+        try:
+            _, variant_id = from_global_id(variantId)
+            variant_id = Variant._meta.pk.to_python(variant_id)
+        except:
+            return None
+
+        return None if variant_id is None else str(variant_id)
+
+    @staticmethod
+    def get_visible_variants(variant_ids: List[str]) -> Dict[str, VariantEligibility]:
+        return {
+            variant_id: eligibility
+            for variant_id, eligibility in VariantEligibilityService.get_eligibility(
+                variant_ids
+            ).items()
+            if eligibility.is_visible
+        }
+
+    @staticmethod
+    def is_protected(variant: VariantEligibility) -> bool:
+        return variant.is_protected
+
+    @staticmethod
+    def get_line_amount(price_sale_amount: Optional[Decimal], quantity: int) -> Decimal:
+        if price_sale_amount is None:
+            return Decimal(0)
+
+        return price_sale_amount * quantity
+
+    def get_variant_lines(
+        self, variant_ids: List[str]
+    ) -> Dict[str, Tuple[Optional[Decimal], Optional[int]]]:
+        line_ids = CartLine.objects.filter(
+            cart_id=self.cart.id, variant_id=OuterRef("pk")
+        ).values("pk")[:1]
+
+        return {
+            str(pk): (price_sale_amount, line_id)
+            for pk, price_sale_amount, line_id in Variant.objects.filter(
+                pk__in=variant_ids
+            )
+            .annotate(line_id=Subquery(line_ids))
+            .values_list("pk", "price_sale_amount", "line_id")
+        }
+
+    @staticmethod
+    def get_lines_with_variant(queryset):
+        return queryset.select_related("variant", "variant__product").only(
+            "id",
+            "cart_id",
+            "variant_id",
+            "quantity",
+            "variant__deleted",
+            "variant__is_published",
+            "variant__published_at",
+            "variant__price_sale_amount",
+            "variant__product__deleted",
+            "variant__product__is_published",
+            "variant__product__published_at",
+        )
+
+    def apply_summary_delta(
+        self, line_count: int = 0, quantity: int = 0, amount: Decimal = 0
+    ) -> None:
+        Cart.objects.filter(pk=self.cart.pk).update(
+            line_count=F("line_count") + line_count,
+            quantity=F("quantity") + quantity,
+            cost_final_amount=F("cost_final_amount") + amount,
+            version=F("version") + 1,
+        )
+        self.cart.refresh_from_db(fields=SUMMARY_FIELDS)
+        CartSnapshotHelper.set_version(self.cart.pk, self.cart.version)
+        CartCounterHelper.sync(self.cart)
+
+    def apply_deleted_delta(self, cart_lines: List[CartLine]) -> None:
+        quantity = 0
+        amount = Decimal(0)
+        for cart_line in cart_lines:
+            if CartPricingHelper.is_visible(cart_line.variant):
+                quantity = quantity + cart_line.quantity
+                amount = amount + self.get_line_amount(
+                    cart_line.variant.price_sale_amount, cart_line.quantity
+                )
+
+        self.apply_summary_delta(-len(cart_lines), -quantity, -amount)
+
+    @staticmethod
+    def soft_delete_lines(cart_lines: List[CartLine]) -> int:
+        if not cart_lines:
+            return 0
+
+        for cart_line in cart_lines:
+            pre_softdelete.send(sender=CartLine, instance=cart_line)
+
+        now = timezone.now()
+        count = CartLine.objects.filter(
+            pk__in=[cart_line.pk for cart_line in cart_lines]
+        ).update(deleted=now, deleted_by_cascade=False, updated_at=now)
+
+        for cart_line in cart_lines:
+            cart_line.deleted = now
+            cart_line.deleted_by_cascade = False
+            cart_line.updated_at = now
+            post_softdelete.send(sender=CartLine, instance=cart_line)
+
+        return count
+
+    def lock_cart(self) -> int:
+        try:
+            return (
+                Cart.objects.select_for_update(
+                    nowait=getattr(settings, "CART_LOCK_NOWAIT", False)
+                )
+                .filter(pk=self.cart.pk)
+                .values_list("version", flat=True)
+                .first()
+            )
+        except DatabaseError:
+            raise ValidationError("This cart is being updated, please retry!")
+
+    @staticmethod
+    def check_version(version: int, expected_version: Optional[int]) -> None:
+        if expected_version is not None and version != expected_version:
+            raise ValidationError("This cart has been modified, please retry!")
+
+    def get_replay_key(self, client_mutation_id: str) -> str:
+        return "cart:" + str(self.cart.pk) + ":mutation:" + client_mutation_id
+
+    def get_replayed_warnings(self, client_mutation_id: Optional[str]):
+        if not client_mutation_id:
+            return None
+
+        return cache.get(self.get_replay_key(client_mutation_id))
+
+    def set_replayed_warnings(
+        self, client_mutation_id: Optional[str], warnings: dict
+    ) -> None:
+        if not client_mutation_id:
+            return
+
+        key = self.get_replay_key(client_mutation_id)
+        transaction.on_commit(
+            lambda: cache.set(
+                key, warnings, getattr(settings, "CART_MUTATION_REPLAY_TIMEOUT", 600)
+            )
+        )
+
+    @classmethod
+    def decode_items(
+        cls,
+        variantIdList: list,
+        quantityList: Optional[list] = None,
+        allow_zero: bool = False,
+    ) -> Tuple[List[Tuple[str, str]], Dict[int, Tuple[str, int]]]:
+        results = []
+        items = {}
+        for index, variantId in enumerate(variantIdList):
+            results.append((variantId, "error"))
+
+            quantity = None
+            if quantityList is not None:
+                quantity = int(quantityList[index])
+                if quantity < 0 or (quantity == 0 and not allow_zero):
+                    continue
+
+            variant_id = cls.decode_variant_id(variantId)
+            if variant_id is None:
+                continue
+
+            items[index] = (variant_id, quantity)
+
+        return results, items
+
+    @instrumentation.instrument("cart.line.create")
+    def create_lines(self, variantIdList: list, quantityList: list) -> dict:
+        results, items = self.decode_items(variantIdList, quantityList)
+
+        variant_ids = list({variant_id for variant_id, _ in items.values()})
+        variants = self.get_visible_variants(variant_ids)
+        variant_lines = self.get_variant_lines(list(variants))
+        existing = {
+            variant_id
+            for variant_id, (_, line_id) in variant_lines.items()
+            if line_id is not None
+        }
+
+        cart_lines = []
+        for index, (variant_id, quantity) in items.items():
+            variantId = results[index][0]
+            variant = variants.get(variant_id)
+            if variant is None or variant_id not in variant_lines:
+                results[index] = (variantId, "not_found")
+            elif self.is_protected(variant):
+                results[index] = (variantId, "in_protected")
+            elif variant_id in existing:
+                results[index] = (variantId, "in_use")
+            else:
+                existing.add(variant_id)
+                cart_lines.append(
+                    CartLine(
+                        cart_id=self.cart.id,
+                        variant_id=variant_id,
+                        quantity=quantity,
+                    )
+                )
+                results[index] = (variantId, "done")
+
+        if cart_lines:
+            CartLine.objects.bulk_create(cart_lines)
+
+            quantity = 0
+            amount = Decimal(0)
+            for cart_line in cart_lines:
+                quantity = quantity + cart_line.quantity
+                amount = amount + self.get_line_amount(
+                    variant_lines[str(cart_line.variant_id)][0], cart_line.quantity
+                )
+            self.apply_summary_delta(len(cart_lines), quantity, amount)
+
+        return self.get_warnings(results)
+
+    @instrumentation.instrument("cart.line.merge")
+    def merge_lines(self, variantIdList: list, quantityList: list) -> dict:
+        results, items = self.decode_items(variantIdList, quantityList)
+
+        variant_ids = list({variant_id for variant_id, _ in items.values()})
+        variants = self.get_visible_variants(variant_ids)
+        variant_lines = self.get_variant_lines(list(variants))
+
+        increments = {}
+        for index, (variant_id, quantity) in items.items():
+            variantId = results[index][0]
+            variant = variants.get(variant_id)
+            if variant is None or variant_id not in variant_lines:
+                results[index] = (variantId, "not_found")
+            elif self.is_protected(variant):
+                results[index] = (variantId, "in_protected")
+            else:
+                increments[variant_id] = increments.get(variant_id, 0) + quantity
+                results[index] = (variantId, "done")
+
+        now = timezone.now()
+        updated = []
+        created = []
+        delta_quantity = 0
+        delta_amount = Decimal(0)
+        for variant_id, quantity in increments.items():
+            price_sale_amount, line_id = variant_lines[variant_id]
+            delta_quantity = delta_quantity + quantity
+            delta_amount = delta_amount + self.get_line_amount(
+                price_sale_amount, quantity
+            )
+
+            if line_id is not None:
+                updated.append(
+                    CartLine(
+                        pk=line_id,
+                        cart_id=self.cart.id,
+                        variant_id=variant_id,
+                        quantity=F("quantity") + quantity,
+                        updated_at=now,
+                    )
+                )
+            else:
+                created.append(
+                    CartLine(
+                        cart_id=self.cart.id,
+                        variant_id=variant_id,
+                        quantity=quantity,
+                    )
+                )
+
+        if updated:
+            CartLine.objects.bulk_update(updated, ["quantity", "updated_at"])
+        if created:
+            CartLine.objects.bulk_create(created)
+        if increments:
+            self.apply_summary_delta(len(created), delta_quantity, delta_amount)
+
+        return self.get_warnings(results)
+
+    @instrumentation.instrument("cart.line.update")
+    def update_lines(self, variantIdList: list, quantityList: list) -> dict:
+        results, items = self.decode_items(variantIdList, quantityList)
+
+        variant_ids = list({variant_id for variant_id, _ in items.values()})
+        variants = self.get_visible_variants(variant_ids)
+        cart_lines = {
+            str(cart_line.variant_id): cart_line
+            for cart_line in CartLine.objects.filter(
+                cart_id=self.cart.id, variant_id__in=list(variants)
+            )
+            .select_related("variant")
+            .only(
+                "id", "cart_id", "variant_id", "quantity", "variant__price_sale_amount"
+            )
+        }
+
+        updated = {}
+        deleted = {}
+        delta_quantity = 0
+        delta_amount = Decimal(0)
+        for index, (variant_id, quantity) in items.items():
+            variantId = results[index][0]
+            variant = variants.get(variant_id)
+            if variant is None:
+                results[index] = (variantId, "error")
+            elif variant_id not in cart_lines or variant_id in deleted:
+                results[index] = (variantId, "not_found")
+            elif self.is_protected(variant):
+                cart_line = cart_lines[variant_id]
+                delta_quantity = delta_quantity - cart_line.quantity
+                delta_amount = delta_amount - self.get_line_amount(
+                    cart_line.variant.price_sale_amount, cart_line.quantity
+                )
+                deleted[variant_id] = cart_line
+                results[index] = (variantId, "error")
+            else:
+                cart_line = cart_lines[variant_id]
+                delta_quantity = delta_quantity + quantity - cart_line.quantity
+                delta_amount = delta_amount + self.get_line_amount(
+                    cart_line.variant.price_sale_amount, quantity - cart_line.quantity
+                )
+                cart_line.quantity = quantity
+                updated[variant_id] = cart_line
+                results[index] = (variantId, "done")
+
+        if updated:
+            now = timezone.now()
+            for cart_line in updated.values():
+                cart_line.updated_at = now
+            CartLine.objects.bulk_update(
+                list(updated.values()), ["quantity", "updated_at"]
+            )
+        self.soft_delete_lines(list(deleted.values()))
+
+        if updated or deleted:
+            self.apply_summary_delta(-len(deleted), delta_quantity, delta_amount)
+
+        return self.get_warnings(results)
+
+    @instrumentation.instrument("cart.line.delete")
+    def delete_lines(self, variantIdList: list) -> dict:
+        results, items = self.decode_items(variantIdList)
+
+        variant_ids = list({variant_id for variant_id, _ in items.values()})
+        cart_lines = {}
+        if variant_ids:
+            cart_lines = {
+                str(cart_line.variant_id): cart_line
+                for cart_line in self.get_lines_with_variant(
+                    CartLine.objects.filter(
+                        cart_id=self.cart.id, variant_id__in=variant_ids
+                    )
+                )
+            }
+
+        deleted = {}
+        for index, (variant_id, _) in items.items():
+            variantId = results[index][0]
+            if variant_id not in cart_lines or variant_id in deleted:
+                results[index] = (variantId, "not_found")
+            else:
+                deleted[variant_id] = cart_lines[variant_id]
+                results[index] = (variantId, "done")
+
+        if deleted:
+            self.soft_delete_lines(list(deleted.values()))
+            self.apply_deleted_delta(list(deleted.values()))
+
+        return self.get_warnings(results)
+
+    @instrumentation.instrument("cart.line.clear")
+    def clear_lines(self) -> int:
+        cart_lines = list(
+            self.get_lines_with_variant(CartLine.objects.filter(cart_id=self.cart.id))
+        )
+
+        count = self.soft_delete_lines(cart_lines)
+        if cart_lines:
+            self.apply_deleted_delta(cart_lines)
+
+        return count
@@ -0,0 +1,146 @@
+import datetime
+from decimal import Decimal
+from typing import Iterable, List
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from django_mall_cart.helpers.cart_counter_helper import CartCounterHelper
+from django_mall_cart.helpers.cart_helper import CartHelper
+from django_mall_cart.helpers.cart_snapshot_helper import CartSnapshotHelper
+from django_mall_cart.models import Cart, CartLine
+from django_mall_product.models import Variant
+
+
+class CartRepricingService:
+    def __init__(self, batch_size: int = 500):
+        self.batch_size = batch_size
+
+    @staticmethod
+    def mark_stale(variant_ids: Iterable) -> int:
+        return Cart.objects.filter(
+            pk__in=CartLine.objects.filter(variant_id__in=variant_ids).values("cart_id")
+        ).update(is_summary_stale=True)
+
+    def iter_stale_cart_ids(self) -> Iterable[List]:
+        last_cart_id = None
+        while True:
+            queryset = Cart.objects.filter(is_summary_stale=True).order_by("pk")
+            if last_cart_id is not None:
+                queryset = queryset.filter(pk__gt=last_cart_id)
+
+            chunk = list(queryset.values_list("pk", flat=True)[: self.batch_size])
+            if not chunk:
+                break
+
+            yield chunk
+
+            if len(chunk) < self.batch_size:
+                break
+            last_cart_id = chunk[-1]
+
+    def iter_cart_ids(self, variant_ids: List[str]) -> Iterable[List]:
+        for start in range(0, len(variant_ids), self.batch_size):
+            queryset = (
+                CartLine.objects.filter(
+                    variant_id__in=variant_ids[start : start + self.batch_size]
+                )
+                .order_by("cart_id")
+                .values_list("cart_id", flat=True)
+                .distinct()
+            )
+
+            last_cart_id = None
+            while True:
+                chunk_queryset = queryset
+                if last_cart_id is not None:
+                    chunk_queryset = chunk_queryset.filter(cart_id__gt=last_cart_id)
+
+                chunk = list(chunk_queryset[: self.batch_size])
+                if not chunk:
+                    break
+
+                yield chunk
+
+                if len(chunk) < self.batch_size:
+                    break
+                last_cart_id = chunk[-1]
+
+    @transaction.atomic
+    def reprice_carts(self, cart_ids: List, skip_locked: bool = False) -> int:
+        carts = list(
+            Cart.objects.select_for_update(skip_locked=skip_locked)
+            .only("id", "version")
+            .filter(pk__in=cart_ids)
+        )
+        summaries = {
+            summary.pop("cart_id"): summary
+            for summary in CartLine.objects.filter(
+                cart_id__in=[cart.pk for cart in carts]
+            )
+            .order_by()
+            .values("cart_id")
+            .annotate(**CartHelper.get_summary_aggregates())
+        }
+
+        for cart in carts:
+            summary = summaries.get(
+                cart.pk,
+                {"line_count": 0, "quantity": 0, "cost_final_amount": Decimal(0)},
+            )
+            cart.line_count = summary["line_count"]
+            cart.quantity = summary["quantity"]
+            cart.cost_final_amount = summary["cost_final_amount"]
+            cart.cost_final_currency = settings.DEFAULT_CURRENCY_CODE
+            cart.is_summary_stale = False
+            cart.version = F("version") + 1
+        Cart.objects.bulk_update(
+            carts,
+            [
+                "line_count",
+                "quantity",
+                "cost_final_amount",
+                "cost_final_currency",
+                "is_summary_stale",
+                "version",
+            ],
+        )
+
+        # Carts skipped while locked keep their stale flag and version for
+        # the next run.
+        repriced_ids = [cart.pk for cart in carts]
+        CartSnapshotHelper.invalidate(repriced_ids)
+        CartCounterHelper.invalidate(repriced_ids)
+
+        return len(carts)
+
+    def reprice(self, variant_ids: Iterable) -> int:
+        variant_ids = sorted({str(variant_id) for variant_id in variant_ids})
+
+        seen = set()
+        count = 0
+        for cart_ids in self.iter_cart_ids(variant_ids):
+            cart_ids = [cart_id for cart_id in cart_ids if cart_id not in seen]
+            seen.update(cart_ids)
+            if cart_ids:
+                count = count + self.reprice_carts(cart_ids)
+
+        return count
+
+    def reprice_stale(self) -> int:
+        count = 0
+        for cart_ids in self.iter_stale_cart_ids():
+            count = count + self.reprice_carts(cart_ids, skip_locked=True)
+
+        return count
+
+    def reprice_published(self, since: datetime.date) -> int:
+        today = datetime.date.today()
+
+        return self.reprice(
+            Variant._base_manager.filter(
+                Q(published_at__gt=since, published_at__lte=today)
+                | Q(product__published_at__gt=since, product__published_at__lte=today)
+            ).values_list("pk", flat=True)
+        )
@@ -1,10 +1,27 @@
-from typing import Tuple
+from typing import Dict, Iterable, List, Tuple
 
+from django.conf import settings
 from django.db import transaction
+from django.db.models import F
+
+from graphql_relay import to_global_id
 
 from django_app_account.models import User
 from django_app_organization.models import Organization
+from django_mall_cart.helpers.cart_counter_helper import CartCounterHelper
+from django_mall_cart.helpers.cart_snapshot_helper import CartSnapshotHelper
+from django_mall_cart.helpers.guest_cart_helper import GuestCartHelper
+from django_mall_cart.helpers.local_cache_helper import LocalTTLCache
 from django_mall_cart.models import Cart
+from django_mall_cart.services.cart_line_service import CartLineService
+
+
+CartKey = Tuple[str, str, str]
+
+cart_id_cache = LocalTTLCache(
+    maxsize=getattr(settings, "CART_ID_LOCAL_CACHE_SIZE", 10000),
+    timeout=getattr(settings, "CART_ID_LOCAL_CACHE_TIMEOUT", 300),
+)
 
 
 class CartService:
@@ -19,3 +36,107 @@ class CartService:
         )
 
         return created, cart
+
+    def get_cart_key(self, slug: str = "default") -> CartKey:
+        return (str(self.organization.pk), str(self.customer.pk), slug)
+
+    def get_cart_id(self, slug: str = "default"):
+        key = self.get_cart_key(slug)
+
+        return self.ensure_carts([key])[key]
+
+    @staticmethod
+    def find_carts(keys: List[CartKey], batch_size: int) -> Dict[CartKey, Cart]:
+        wanted = set(keys)
+        carts = {}
+        for index in range(0, len(keys), batch_size):
+            chunk = keys[index : index + batch_size]
+            for cart in Cart.all_objects.filter(
+                organization_id__in={key[0] for key in chunk},
+                customer_id__in={key[1] for key in chunk},
+                slug__in={key[2] for key in chunk},
+            ).only("id", "organization_id", "customer_id", "slug", "deleted"):
+                key = (str(cart.organization_id), str(cart.customer_id), cart.slug)
+                if key in wanted:
+                    carts[key] = cart
+
+        return carts
+
+    @classmethod
+    @transaction.atomic
+    def ensure_carts(
+        cls, keys: Iterable[CartKey], batch_size: int = 500
+    ) -> Dict[CartKey, str]:
+        keys = list(
+            dict.fromkeys(
+                (str(organization_id), str(customer_id), slug)
+                for organization_id, customer_id, slug in keys
+            )
+        )
+
+        cached = cart_id_cache.get_many(keys)
+        missing = [key for key in keys if key not in cached]
+        if missing:
+            carts = cls.find_carts(missing, batch_size)
+
+            Cart.objects.bulk_create(
+                [
+                    Cart(organization_id=key[0], customer_id=key[1], slug=key[2])
+                    for key in missing
+                    if key not in carts
+                ],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+            carts.update(
+                cls.find_carts([key for key in missing if key not in carts], batch_size)
+            )
+
+            deleted = [cart.pk for cart in carts.values() if cart.deleted]
+            if deleted:
+                # The lines of a deleted cart were deleted with it.
+                Cart.all_objects.filter(pk__in=deleted).update(
+                    deleted=None,
+                    deleted_by_cascade=False,
+                    line_count=0,
+                    quantity=0,
+                    cost_final_amount=0,
+                    is_summary_stale=False,
+                    version=F("version") + 1,
+                )
+                CartSnapshotHelper.invalidate(deleted)
+                CartCounterHelper.invalidate(deleted)
+
+            found = {key: cart.pk for key, cart in carts.items()}
+            transaction.on_commit(lambda: cart_id_cache.set_many(found))
+            cached.update(found)
+
+        return cached
+
+    @transaction.atomic
+    def merge_guest_cart(
+        self, guest_cart_helper: GuestCartHelper, slug: str = "default"
+    ) -> Tuple[dict, Cart]:
+        cart = Cart.objects.filter(pk=self.get_cart_id(slug=slug)).first()
+        if cart is None:
+            # The cart was deleted by another process after this one cached
+            # its id, so the receivers couldn't evict it here.
+            cart_id_cache.delete_many([self.get_cart_key(slug)])
+            cart = Cart.objects.get(pk=self.get_cart_id(slug=slug))
+
+        cart_line_service = CartLineService(cart=cart)
+        cart_line_service.lock_cart()
+
+        variantIdList = [
+            to_global_id("VariantNode", variant_id)
+            for variant_id in guest_cart_helper.lines
+        ]
+        quantityList = list(guest_cart_helper.lines.values())
+        if variantIdList:
+            warnings = cart_line_service.merge_lines(variantIdList, quantityList)
+        else:
+            warnings = cart_line_service.get_warnings([])
+
+        transaction.on_commit(guest_cart_helper.delete)
+
+        return warnings, cart
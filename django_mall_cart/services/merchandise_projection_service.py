@@ -0,0 +1,232 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import BooleanField, Case, Value, When
+
+from django_mall_cart.helpers.cart_helper import CartHelper
+from django_mall_cart.helpers.instrumentation_helper import instrumentation
+from django_mall_cart.helpers.photo_url_helper import PhotoUrlHelper
+from django_mall_product.models import ProductPhoto, Variant
+
+
+VARIANT_FIELDS = (
+    "pk",
+    "slug",
+    "currency",
+    "price_amount",
+    "price_sale_amount",
+    "is_eligible",
+    "product_id",
+    "product__serial",
+    "product__slug",
+    "product__organization_id",
+    "product__organization__language_code",
+)
+
+
+class MerchandiseProjectionService:
+    @staticmethod
+    def get_key(variant_id) -> str:
+        return "cart:variant:" + str(variant_id) + ":merchandise"
+
+    @staticmethod
+    def get_timeout() -> int:
+        return getattr(settings, "CART_MERCHANDISE_PROJECTION_TIMEOUT", 300)
+
+    @classmethod
+    def get_cached(cls, cached: Dict, variant_ids: List[str]) -> Tuple[Dict, List]:
+        result = {
+            variant_id: cached[cls.get_key(variant_id)]
+            for variant_id in variant_ids
+            if cls.get_key(variant_id) in cached
+        }
+        missing = [variant_id for variant_id in variant_ids if variant_id not in result]
+        instrumentation.cache_result("merchandise", len(result), len(missing))
+
+        return result, missing
+
+    @classmethod
+    def get_projections(cls, variant_ids: Iterable) -> Dict[str, dict]:
+        variant_ids = [str(variant_id) for variant_id in variant_ids]
+        if not variant_ids:
+            return {}
+
+        result, missing = cls.get_cached(
+            cache.get_many([cls.get_key(variant_id) for variant_id in variant_ids]),
+            variant_ids,
+        )
+        if missing:
+            loaded = cls.load(missing)
+            cache.set_many(
+                {
+                    cls.get_key(variant_id): projection
+                    for variant_id, projection in loaded.items()
+                },
+                cls.get_timeout(),
+            )
+            result.update(loaded)
+
+        return result
+
+    @classmethod
+    async def aget_projections(cls, variant_ids: Iterable) -> Dict[str, dict]:
+        variant_ids = [str(variant_id) for variant_id in variant_ids]
+        if not variant_ids:
+            return {}
+
+        result, missing = cls.get_cached(
+            await cache.aget_many(
+                [cls.get_key(variant_id) for variant_id in variant_ids]
+            ),
+            variant_ids,
+        )
+        if missing:
+            loaded = await cls.aload(missing)
+            await cache.aset_many(
+                {
+                    cls.get_key(variant_id): projection
+                    for variant_id, projection in loaded.items()
+                },
+                cls.get_timeout(),
+            )
+            result.update(loaded)
+
+        return result
+
+    @staticmethod
+    def get_variant_queryset(variant_ids: Iterable[str]):
+        return (
+            Variant._base_manager.filter(pk__in=variant_ids)
+            .annotate(
+                is_eligible=Case(
+                    When(CartHelper.get_visible_q(), then=Value(True)),
+                    default=Value(False),
+                    output_field=BooleanField(),
+                )
+            )
+            .values(*VARIANT_FIELDS)
+        )
+
+    @staticmethod
+    def get_option_value_queryset(language_code: str, variant_ids: Iterable):
+        return (
+            Variant.objects.filter(
+                pk__in=variant_ids,
+                selected_option_values__translations__language_code=language_code,
+            )
+            .order_by("pk", "selected_option_values__product_option__sort_key")
+            .values_list(
+                "pk",
+                "selected_option_values__id",
+                "selected_option_values__translations__name",
+            )
+        )
+
+    @staticmethod
+    def get_photo_queryset(product_ids: Iterable):
+        return (
+            ProductPhoto.objects.filter(product_id__in=product_ids)
+            .order_by("product_id", "-is_primary", "created_at")
+            .values_list("product_id", "s3_key")
+        )
+
+    @staticmethod
+    def get_variant_ids_by_language(variants: List[dict]) -> Dict[str, set]:
+        variant_ids_by_language = defaultdict(set)
+        for variant in variants:
+            language_code = variant["product__organization__language_code"]
+            if language_code:
+                variant_ids_by_language[language_code].add(variant["pk"])
+
+        return variant_ids_by_language
+
+    @staticmethod
+    def build(
+        variants: List[dict], option_rows: Iterable, photo_rows: Iterable
+    ) -> Dict[str, dict]:
+        option_values = defaultdict(list)
+        seen = set()
+        for variant_id, option_value_id, name in option_rows:
+            if (variant_id, option_value_id) in seen:
+                continue
+            seen.add((variant_id, option_value_id))
+
+            option_values[variant_id].append(name)
+
+        photos = {}
+        for product_id, s3_key in photo_rows:
+            photos.setdefault(product_id, s3_key)
+
+        result = {}
+        for variant in variants:
+            s3_key = photos.get(variant["product_id"])
+            result[str(variant["pk"])] = {
+                "variant_id": variant["pk"],
+                "variant_slug": variant["slug"],
+                "product_id": variant["product_id"],
+                "product_serial": variant["product__serial"],
+                "product_slug": variant["product__slug"],
+                "language_code": variant["product__organization__language_code"],
+                "currency": variant["currency"],
+                "price_amount": variant["price_amount"],
+                "price_sale_amount": variant["price_sale_amount"],
+                "is_visible": variant["is_eligible"],
+                "selected_option_values": option_values[variant["pk"]],
+                "photo_key": None
+                if s3_key is None
+                else PhotoUrlHelper.build_key(
+                    variant["product__organization_id"], variant["product_id"], s3_key
+                ),
+                "photo_s3_key": s3_key,
+            }
+
+        return result
+
+    @classmethod
+    def load(cls, variant_ids: List[str]) -> Dict[str, dict]:
+        variants = list(cls.get_variant_queryset(variant_ids))
+
+        option_rows = []
+        for language_code, ids in cls.get_variant_ids_by_language(variants).items():
+            option_rows.extend(cls.get_option_value_queryset(language_code, ids))
+
+        photo_rows = cls.get_photo_queryset(
+            {variant["product_id"] for variant in variants}
+        )
+
+        return cls.build(variants, option_rows, photo_rows)
+
+    @classmethod
+    async def aload(cls, variant_ids: List[str]) -> Dict[str, dict]:
+        variants = [variant async for variant in cls.get_variant_queryset(variant_ids)]
+
+        option_rows = []
+        for language_code, ids in cls.get_variant_ids_by_language(variants).items():
+            async for row in cls.get_option_value_queryset(language_code, ids):
+                option_rows.append(row)
+
+        photo_rows = [
+            row
+            async for row in cls.get_photo_queryset(
+                {variant["product_id"] for variant in variants}
+            )
+        ]
+
+        return cls.build(variants, option_rows, photo_rows)
+
+    @classmethod
+    def invalidate(cls, variant_ids: Iterable) -> None:
+        keys = [cls.get_key(variant_id) for variant_id in variant_ids]
+        if keys:
+            transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @classmethod
+    def invalidate_product(cls, product_id) -> None:
+        cls.invalidate(
+            Variant._base_manager.filter(product_id=product_id).values_list(
+                "pk", flat=True
+            )
+        )
@@ -0,0 +1,98 @@
+from typing import Dict, Iterable, NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, OuterRef, Subquery, Value, When
+
+from django_mall_cart.helpers.cart_helper import CartHelper
+from django_mall_cart.helpers.instrumentation_helper import instrumentation
+from django_mall_product.models import Variant
+
+
+class VariantEligibility(NamedTuple):
+    is_visible: bool
+    is_protected: bool
+
+
+NOT_FOUND = VariantEligibility(False, False)
+
+
+class VariantEligibilityService:
+    @staticmethod
+    def get_key(variant_id) -> str:
+        return "cart:variant:" + str(variant_id) + ":visibility"
+
+    @classmethod
+    def get_eligibility(
+        cls, variant_ids: Iterable[str]
+    ) -> Dict[str, VariantEligibility]:
+        variant_ids = [str(variant_id) for variant_id in variant_ids]
+        if not variant_ids:
+            return {}
+
+        keys = {cls.get_key(variant_id): variant_id for variant_id in variant_ids}
+        cached = cache.get_many(list(keys))
+        result = {
+            keys[key]: VariantEligibility(*value) for key, value in cached.items()
+        }
+
+        missing = [variant_id for variant_id in variant_ids if variant_id not in result]
+        instrumentation.cache_result("variant_eligibility", len(result), len(missing))
+        if missing:
+            loaded = cls.load(missing)
+            cache.set_many(
+                {
+                    cls.get_key(variant_id): tuple(eligibility)
+                    for variant_id, eligibility in loaded.items()
+                },
+                getattr(settings, "CART_VARIANT_ELIGIBILITY_TIMEOUT", 60),
+            )
+            result.update(loaded)
+
+        return result
+
+    @staticmethod
+    def load(variant_ids: Iterable[str]) -> Dict[str, VariantEligibility]:
+        siblings = (
+            Variant.objects.filter(product_id=OuterRef("product_id"))
+            .order_by()
+            .values("product_id")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        variants = (
+            Variant.objects.filter(pk__in=variant_ids)
+            .annotate(
+                is_eligible=Case(
+                    When(CartHelper.get_visible_q(), then=Value(True)),
+                    default=Value(False),
+                    output_field=BooleanField(),
+                ),
+                sibling_count=Subquery(siblings),
+            )
+            .values_list("pk", "is_eligible", "is_primary", "sibling_count")
+        )
+
+        result = {variant_id: NOT_FOUND for variant_id in variant_ids}
+        for pk, is_eligible, is_primary, sibling_count in variants:
+            result[str(pk)] = VariantEligibility(
+                is_visible=is_eligible,
+                is_protected=is_primary and (sibling_count or 0) > 1,
+            )
+
+        return result
+
+    @classmethod
+    def invalidate(cls, variant_ids: Iterable) -> None:
+        keys = [cls.get_key(variant_id) for variant_id in variant_ids]
+        if keys:
+            transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @classmethod
+    def invalidate_product(cls, product_id) -> None:
+        cls.invalidate(
+            Variant._base_manager.filter(product_id=product_id).values_list(
+                "pk", flat=True
+            )
+        )
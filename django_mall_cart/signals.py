@@ -0,0 +1,135 @@
+from typing import List
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from safedelete.signals import post_softdelete, post_undelete
+
+from django_mall_cart.helpers.cart_counter_helper import CartCounterHelper
+from django_mall_cart.helpers.cart_snapshot_helper import CartSnapshotHelper
+from django_mall_cart.models import Cart
+from django_mall_cart.services.cart_repricing_service import CartRepricingService
+from django_mall_cart.services.cart_service import cart_id_cache
+from django_mall_cart.services.merchandise_projection_service import (
+    MerchandiseProjectionService,
+)
+from django_mall_cart.services.variant_eligibility_service import (
+    VariantEligibilityService,
+)
+from django_mall_product.models import Product, ProductPhoto, Variant
+
+
+VARIANT_SUMMARY_FIELDS = {
+    "is_published",
+    "published_at",
+    "price_sale_amount",
+    "deleted",
+}
+PRODUCT_SUMMARY_FIELDS = {
+    "is_published",
+    "published_at",
+    "deleted",
+}
+
+
+def invalidate_cart_summary(variant_ids: List) -> None:
+    def reprice():
+        cart_repricing_service = CartRepricingService()
+        cart_repricing_service.mark_stale(variant_ids)
+        if not getattr(settings, "CART_REPRICING_DEFERRED", False):
+            cart_repricing_service.reprice(variant_ids)
+
+    if variant_ids:
+        transaction.on_commit(reprice)
+
+
+def has_summary_changes(sender, instance, fields: set, update_fields=None) -> bool:
+    if instance._state.adding or instance.pk is None:
+        return False
+    if update_fields:
+        fields = fields.intersection(update_fields)
+        if not fields:
+            return False
+
+    previous = sender._base_manager.filter(pk=instance.pk).values(*fields).first()
+    if previous is None:
+        return False
+
+    return any(getattr(instance, field) != value for field, value in previous.items())
+
+
+@receiver(pre_save, sender=Variant)
+def track_variant_summary_changes(sender, instance, update_fields=None, **kwargs):
+    instance._cart_summary_changed = has_summary_changes(
+        sender, instance, VARIANT_SUMMARY_FIELDS, update_fields
+    )
+
+
+@receiver(pre_save, sender=Product)
+def track_product_summary_changes(sender, instance, update_fields=None, **kwargs):
+    instance._cart_summary_changed = has_summary_changes(
+        sender, instance, PRODUCT_SUMMARY_FIELDS, update_fields
+    )
+
+
+@receiver(post_save, sender=Variant)
+def invalidate_cart_summary_by_variant(sender, instance, **kwargs):
+    if not getattr(instance, "_cart_summary_changed", False):
+        return
+
+    invalidate_cart_summary([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+def invalidate_cart_summary_by_product(sender, instance, **kwargs):
+    if not getattr(instance, "_cart_summary_changed", False):
+        return
+
+    invalidate_cart_summary(
+        list(
+            Variant._base_manager.filter(product_id=instance.pk).values_list(
+                "pk", flat=True
+            )
+        )
+    )
+
+
+@receiver(post_save, sender=Variant)
+@receiver(post_delete, sender=Variant)
+def invalidate_variant_eligibility_by_variant(sender, instance, **kwargs):
+    VariantEligibilityService.invalidate_product(instance.product_id)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_variant_eligibility_by_product(sender, instance, **kwargs):
+    VariantEligibilityService.invalidate_product(instance.pk)
+
+
+@receiver(post_save, sender=Variant)
+@receiver(post_delete, sender=Variant)
+def invalidate_merchandise_projection_by_variant(sender, instance, **kwargs):
+    MerchandiseProjectionService.invalidate([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductPhoto)
+@receiver(post_delete, sender=ProductPhoto)
+def invalidate_merchandise_projection_by_product(sender, instance, **kwargs):
+    MerchandiseProjectionService.invalidate_product(
+        instance.pk if sender is Product else instance.product_id
+    )
+
+
+@receiver(post_softdelete, sender=Cart)
+@receiver(post_undelete, sender=Cart)
+@receiver(post_delete, sender=Cart)
+def delete_cart_caches(sender, instance, **kwargs):
+    CartSnapshotHelper.delete([instance.pk])
+    CartCounterHelper.delete([instance])
+    cart_id_cache.delete_many(
+        [(str(instance.organization_id), str(instance.customer_id), instance.slug)]
+    )
@@ -0,0 +1,14 @@
+from django.http import Http404, HttpResponse
+
+from django_mall_cart.helpers.instrumentation_helper import (
+    PrometheusSink,
+    instrumentation,
+)
+
+
+def metrics(request):
+    sink = instrumentation.get_sink(PrometheusSink)
+    if sink is None:
+        raise Http404
+
+    return HttpResponse(sink.render(), content_type="text/plain; version=0.0.4")